@@ -1,5 +1,6 @@
 import json
 import logging
+import re
 from pathlib import Path
 from typing import Dict, List, Tuple
 
@@ -8,6 +9,18 @@ import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Compressed IVF index by default; "Flat" keeps exact brute-force search.
+# nlist=128 trains from ~5k vectors, so the ~8.6k-chunk corpus uses it.
+DEFAULT_INDEX_SPEC = "IVF128,PQ96"
+DEFAULT_NPROBE = 8
+# FAISS warns below ~39 training points per IVF list; PQ needs 256 per sub-quantizer.
+MIN_POINTS_PER_LIST = 39
+MIN_PQ_TRAIN_POINTS = 256
+MAX_TRAIN_POINTS = 65536
+
+_RE_IVF = re.compile(r"IVF(\d+)")
+_RE_PQ = re.compile(r"PQ(\d+)")
+
 
 class FaissIndex:
     """FAISS index builder/loader for Phase 3 retrieval."""
@@ -17,10 +30,14 @@ class FaissIndex:
         manifest_path: Path = Path("data/semantic_chunks/embedding_manifest.json"),
         index_path: Path = Path("data/retrieval/faiss.index"),
         id_map_path: Path = Path("data/retrieval/id_mapping.json"),
+        index_spec: str = DEFAULT_INDEX_SPEC,
+        nprobe: int = DEFAULT_NPROBE,
     ) -> None:
         self.manifest_path = manifest_path
         self.index_path = index_path
         self.id_map_path = id_map_path
+        self.index_spec = index_spec
+        self.nprobe = nprobe
 
     def _load_manifest(self) -> Tuple[np.ndarray, List[str], int]:
         if not self.manifest_path.exists():
@@ -28,16 +45,75 @@ class FaissIndex:
         with self.manifest_path.open("r", encoding="utf-8") as f:
             manifest = json.load(f)
 
-        records = manifest.get("chunks") or []
-        if not records:
-            raise ValueError("Embedding manifest has no records")
-
-        embeddings = np.array([rec["embedding"] for rec in records], dtype=np.float32)
-        chunk_ids = [rec["chunk_id"] for rec in records]
+        if "embeddings_file" in manifest:
+            chunk_ids = list(manifest.get("chunk_ids") or [])
+            if not chunk_ids:
+                raise ValueError("Embedding manifest has no records")
+            embeddings = np.load(self.manifest_path.parent / manifest["embeddings_file"]).astype(np.float32)
+            if embeddings.shape[0] != len(chunk_ids):
+                raise ValueError("Embedding matrix rows and manifest chunk_ids differ")
+        elif "chunks" in manifest:
+            # Legacy manifests carry one JSON vector per chunk.
+            records = manifest["chunks"]
+            if not records:
+                raise ValueError("Embedding manifest has no records")
+            embeddings = np.array([rec["embedding"] for rec in records], dtype=np.float32)
+            chunk_ids = [rec["chunk_id"] for rec in records]
+        else:
+            raise ValueError(
+                f"Embedding manifest {self.manifest_path} has neither embeddings_file nor inline vectors; re-run Phase 2"
+            )
         dim = int(manifest.get("dimension") or embeddings.shape[1])
         return embeddings, chunk_ids, dim
 
-    def build(self, force: bool = False) -> Tuple[faiss.IndexFlatIP, List[str]]:
+    def _create_index(self, embeddings: np.ndarray, dim: int) -> faiss.Index:
+        """Create and train the configured index; fall back to exact search when it cannot be trained."""
+        if self.index_spec.strip().lower() == "flat":
+            return faiss.IndexFlatIP(dim)
+
+        # Check the spec against the data before index_factory, which aborts on a bad PQ split.
+        ivf = _RE_IVF.search(self.index_spec)
+        pq = _RE_PQ.search(self.index_spec)
+        nlist = int(ivf.group(1)) if ivf else 0
+        pq_m = int(pq.group(1)) if pq else 0
+        if pq_m and dim % pq_m:
+            logger.warning(
+                "Dimension %d is not divisible by %d PQ sub-quantizers (%s). Using exact IndexFlatIP instead.",
+                dim,
+                pq_m,
+                self.index_spec,
+            )
+            return faiss.IndexFlatIP(dim)
+
+        needed = max(MIN_POINTS_PER_LIST * nlist, MIN_PQ_TRAIN_POINTS if pq_m else 0)
+        count = embeddings.shape[0]
+        if count < needed:
+            logger.warning(
+                "Only %d vectors; %s needs at least %d to train. Using exact IndexFlatIP instead.",
+                count,
+                self.index_spec,
+                needed,
+            )
+            return faiss.IndexFlatIP(dim)
+
+        index = faiss.index_factory(dim, self.index_spec, faiss.METRIC_INNER_PRODUCT)
+        if index.is_trained:
+            return index
+
+        train = embeddings
+        if count > MAX_TRAIN_POINTS:
+            rng = np.random.default_rng(0)
+            train = embeddings[rng.choice(count, MAX_TRAIN_POINTS, replace=False)]
+        index.train(train)
+        return index
+
+    def _apply_search_params(self, index: faiss.Index) -> None:
+        try:
+            faiss.extract_index_ivf(index).nprobe = self.nprobe
+        except RuntimeError:
+            pass  # not an IVF index
+
+    def build(self, force: bool = False) -> Tuple[faiss.Index, List[str]]:
         if self.index_path.exists() and self.id_map_path.exists() and not force:
             logger.info("Index already exists; skipping rebuild")
             return self.load()
@@ -48,18 +124,21 @@ class FaissIndex:
             raise ValueError(f"Embedding dimension mismatch: data={embeddings.shape[1]}, manifest={dim}")
 
         faiss.normalize_L2(embeddings)
-        index = faiss.IndexFlatIP(dim)
+        index = self._create_index(embeddings, dim)
         index.add(embeddings)
+        self._apply_search_params(index)
 
         self.index_path.parent.mkdir(parents=True, exist_ok=True)
         faiss.write_index(index, str(self.index_path))
         with self.id_map_path.open("w", encoding="utf-8") as f:
             json.dump({"ids": chunk_ids}, f, ensure_ascii=False, indent=2)
 
-        logger.info("Built FAISS index with %d vectors (dim=%d)", len(chunk_ids), dim)
+        logger.info("Built FAISS index with %d vectors (dim=%d, spec=%s)", len(chunk_ids), dim, self.index_spec)
+        if hasattr(faiss, "get_compile_options"):
+            logger.info("FAISS compile options: %s", faiss.get_compile_options())
         return index, chunk_ids
 
-    def load(self) -> Tuple[faiss.IndexFlatIP, List[str]]:
+    def load(self) -> Tuple[faiss.Index, List[str]]:
         if not self.index_path.exists() or not self.id_map_path.exists():
             raise FileNotFoundError("FAISS index or id mapping not found; build first")
         index = faiss.read_index(str(self.index_path))
@@ -68,9 +147,10 @@ class FaissIndex:
         chunk_ids = mapping.get("ids", [])
         if index.ntotal != len(chunk_ids):
             raise ValueError("Index size and id mapping length differ")
+        self._apply_search_params(index)
         return index, chunk_ids
 
-    def ensure(self, force: bool = False) -> Tuple[faiss.IndexFlatIP, List[str]]:
+    def ensure(self, force: bool = False) -> Tuple[faiss.Index, List[str]]:
         if self.index_path.exists() and self.id_map_path.exists() and not force:
             return self.load()
         return self.build(force=force)
@@ -12,6 +12,7 @@ if __package__ is None or __package__ == "":
     if str(src_dir) not in sys.path:
         sys.path.append(str(src_dir))
     from retrieval.answer_synthesizer import AnswerSynthesizer
+    from retrieval.faiss_index import DEFAULT_INDEX_SPEC, DEFAULT_NPROBE
     from retrieval.query_logger import QueryLogger
     from retrieval.retriever import Retriever
     from retrieval.reranker import Reranker
@@ -22,6 +23,7 @@ if __package__ is None or __package__ == "":
     )
 else:
     from .answer_synthesizer import AnswerSynthesizer
+    from .faiss_index import DEFAULT_INDEX_SPEC, DEFAULT_NPROBE
     from .query_logger import QueryLogger
     from .retriever import Retriever
     from .reranker import Reranker
@@ -50,6 +52,8 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--top-k", type=int, default=5, help="Top K chunks to retrieve")
     parser.add_argument("--force-rebuild-index", action="store_true", help="Rebuild FAISS index from embeddings")
     parser.add_argument("--model", default="jinaai/jina-embeddings-v2-base-en", help="Embedding model (must match Phase 2)")
+    parser.add_argument("--index-spec", default=DEFAULT_INDEX_SPEC, help='FAISS index_factory spec; "Flat" for exact search (applies on rebuild)')
+    parser.add_argument("--nprobe", type=int, default=DEFAULT_NPROBE, help="IVF lists probed per query")
     return parser.parse_args()
 
 
@@ -150,6 +154,8 @@ def load_pipeline(args: argparse.Namespace) -> dict:
         id_map_path=Path("data/retrieval/id_mapping.json"),
         model_name=args.model,
         force_rebuild_index=args.force_rebuild_index,
+        index_spec=args.index_spec,
+        nprobe=args.nprobe,
     )
     reranker = Reranker()
     synthesizer = AnswerSynthesizer()
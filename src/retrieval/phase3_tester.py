@@ -10,6 +10,7 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List
@@ -55,10 +56,19 @@ def check_files() -> Dict[str, object]:
     required = [
         Path("data/semantic_chunks/chunks.jsonl"),
         Path("data/semantic_chunks/embedding_manifest.json"),
+        Path("data/semantic_chunks/embeddings.npy"),
         Path("data/retrieval/faiss.index"),
         Path("data/retrieval/id_mapping.json"),
     ]
-    missing = [str(p) for p in required if not p.exists()]
+    # One directory listing per distinct parent instead of one stat() per file.
+    present: Dict[Path, set] = {}
+    for parent in {p.parent for p in required}:
+        try:
+            with os.scandir(parent) as entries:
+                present[parent] = {e.name for e in entries}
+        except (FileNotFoundError, NotADirectoryError):
+            present[parent] = set()
+    missing = [str(p) for p in required if p.name not in present[p.parent]]
     status = "pass" if not missing else "fail"
     return {"name": "files_exist", "status": status, "missing": missing}
 
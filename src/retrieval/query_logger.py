@@ -1,22 +1,58 @@
-import json
+import atexit
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List
 
+import orjson
+
 
 class QueryLogger:
-    """Append-only JSONL logger for Phase 3 queries."""
+    """Append-only JSONL logger for Phase 3 queries.
+
+    Keeps a single buffered file handle open for the logger's lifetime and
+    flushes every ``flush_every`` records (and at interpreter exit).
+    """
 
-    def __init__(self, log_path: Path = Path("data/retrieval/query_log.jsonl")) -> None:
+    def __init__(
+        self,
+        log_path: Path = Path("data/retrieval/query_log.jsonl"),
+        flush_every: int = 32,
+        buffer_size: int = 1 << 16,
+    ) -> None:
         self.log_path = log_path
         self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = max(1, flush_every)
+        self._fh = self.log_path.open("ab", buffering=buffer_size)
+        self._lock = threading.Lock()
+        self._pending = 0
+        atexit.register(self.close)
 
     def log(self, query: str, retrieved_ids: List[str], used_ids: List[str]) -> None:
         record = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": datetime.now(timezone.utc),
             "query": query,
             "retrieved_chunk_ids": retrieved_ids,
             "used_chunk_ids": used_ids,
         }
-        with self.log_path.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        line = orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+        with self._lock:
+            if self._fh.closed:
+                raise ValueError("QueryLogger is closed")
+            self._fh.write(line)
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._fh.flush()
+                self._pending = 0
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._fh.closed:
+                self._fh.flush()
+                self._pending = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._fh.closed:
+                self._fh.close()
+        atexit.unregister(self.close)
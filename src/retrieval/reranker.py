@@ -4,7 +4,8 @@ Two-stage flow: after FAISS recall, apply lightweight heuristic scoring to
 promote passages likely about death/defeat events for the detected entity.
 """
 
-from typing import List, Dict, Any, Optional
+import heapq
+from typing import Any, Callable, Dict, List, Optional
 
 
 class Reranker:
@@ -24,22 +25,36 @@ class Reranker:
             "shot",
         ]
 
-    def _score_chunk(self, chunk: Dict[str, Any], entity: Optional[str], focus_event: bool) -> float:
-        base = float(chunk.get("score", 0.0))
+    def _death_hits(self, text: str) -> int:
+        return sum(1 for kw in self.death_keywords if kw in text)
+
+    def _score_base(self, chunk: Dict[str, Any]) -> float:
+        return float(chunk.get("score", 0.0))
+
+    def _score_focus(self, chunk: Dict[str, Any]) -> float:
+        hits = self._death_hits(chunk.get("text", "").lower())
+        return float(chunk.get("score", 0.0)) * (1.0 + 0.05 * min(hits, 3))  # cap boost
+
+    def _score_entity_focus(self, chunk: Dict[str, Any], name: str) -> float:
         text = chunk.get("text", "").lower()
-        score = base
+        name_boost = 1.1 if name in text else 1.0  # soft boost if entity mentioned
+        hits = self._death_hits(text)
+        return float(chunk.get("score", 0.0)) * name_boost * (1.0 + 0.05 * min(hits, 3))
 
+    def _select_scorer(self, entity: Optional[str], focus_event: bool) -> Callable[[Dict[str, Any]], float]:
+        """Pick the scoring kernel once per rerank call instead of branching per chunk."""
+        if entity and focus_event:
+            name = entity.lower()
+            return lambda chunk: self._score_entity_focus(chunk, name)
         if entity:
             name = entity.lower()
-            if name in text:
-                score *= 1.1  # soft boost if entity mentioned
-
+            return lambda chunk: self._score_base(chunk) * (1.1 if name in chunk.get("text", "").lower() else 1.0)
         if focus_event:
-            hits = sum(1 for kw in self.death_keywords if kw in text)
-            if hits:
-                score *= 1.0 + 0.05 * min(hits, 3)  # cap boost
+            return self._score_focus
+        return self._score_base
 
-        return score
+    def _score_chunk(self, chunk: Dict[str, Any], entity: Optional[str], focus_event: bool) -> float:
+        return self._select_scorer(entity, focus_event)(chunk)
 
     def rerank(
         self,
@@ -48,12 +63,9 @@ class Reranker:
         top_k: int = 5,
         entity: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
-        scored: List[Dict[str, Any]] = []
-        for c in candidates:
-            new_score = self._score_chunk(c, entity, focus_event=entity is not None)
-            item = dict(c)
-            item["score"] = new_score
-            scored.append(item)
-
-        scored.sort(key=lambda x: x["score"], reverse=True)
-        return scored[:top_k]
+        score = self._select_scorer(entity, focus_event=entity is not None)
+        scores = [score(c) for c in candidates]
+
+        # Only the top_k survivors are copied; nlargest keeps ties in input order like a stable sort.
+        order = heapq.nlargest(max(top_k, 0), range(len(candidates)), key=scores.__getitem__)
+        return [{**candidates[i], "score": scores[i]} for i in order]
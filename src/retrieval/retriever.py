@@ -15,7 +15,7 @@ if __package__ is None or __package__ == "":
     from semantic.embedder import Embedder
 else:
     from semantic.embedder import Embedder
-from .faiss_index import FaissIndex
+from .faiss_index import DEFAULT_INDEX_SPEC, DEFAULT_NPROBE, FaissIndex
 
 logger = logging.getLogger(__name__)
 
@@ -32,12 +32,25 @@ class Retriever:
         model_name: str = "jinaai/jina-embeddings-v2-base-en",
         batch_size: int = 32,
         force_rebuild_index: bool = False,
+        use_gpu: bool = False,
+        gpu_device: int = 0,
+        index_spec: str = DEFAULT_INDEX_SPEC,
+        nprobe: int = DEFAULT_NPROBE,
     ) -> None:
         self.chunks_path = chunks_path
         self.batch_size = batch_size
         self.embedder = Embedder(model_name=model_name)
-        self.indexer = FaissIndex(manifest_path=manifest_path, index_path=index_path, id_map_path=id_map_path)
+        self.indexer = FaissIndex(
+            manifest_path=manifest_path,
+            index_path=index_path,
+            id_map_path=id_map_path,
+            index_spec=index_spec,
+            nprobe=nprobe,
+        )
         self.index, self.id_map = self.indexer.ensure(force=force_rebuild_index)
+        self._gpu_resources = None
+        if use_gpu:
+            self.index = self._to_gpu(self.index, gpu_device)
         self.chunk_lookup = self._load_chunks(chunks_path)
         self.dimension = self.index.d
 
@@ -55,11 +68,36 @@ class Retriever:
                     lookup[cid] = row
         return lookup
 
-    def _embed_query(self, query: str) -> np.ndarray:
-        vec = self.embedder.embed_text(query)
-        vec = np.asarray(vec, dtype=np.float32)
-        faiss.normalize_L2(vec.reshape(1, -1))
-        return vec
+    def _to_gpu(self, index: faiss.Index, device: int) -> faiss.Index:
+        if not hasattr(faiss, "StandardGpuResources"):
+            logger.warning("FAISS was built without GPU support; searching on CPU")
+            return index
+        try:
+            self._gpu_resources = faiss.StandardGpuResources()
+            options = faiss.GpuClonerOptions()
+            options.useFloat16 = True  # keeps IVF-PQ lookup tables within shared memory
+            gpu_index = faiss.index_cpu_to_gpu(self._gpu_resources, device, index, options)
+        except Exception as exc:  # pragma: no cover - depends on local CUDA setup
+            logger.warning("Could not move FAISS index to GPU %d (%s); searching on CPU", device, exc)
+            self._gpu_resources = None
+            return index
+        logger.info("Moved FAISS index to GPU %d", device)
+        return gpu_index
+
+    def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        vecs = self.embedder.embed_texts(queries, batch_size=self.batch_size, show_progress_bar=False)
+        faiss.normalize_L2(vecs)
+        return vecs
+
+    @staticmethod
+    def _dedupe_queries(queries: List[str]) -> List[str]:
+        # Results are merged by max score, so near-identical expansions only cost extra embeds/searches.
+        unique: Dict[str, str] = {}
+        for q in queries:
+            key = " ".join(q.split()).lower()
+            if key and key not in unique:
+                unique[key] = q
+        return list(unique.values())
 
     def _filter_ids(self, candidate_ids: List[str], filters: Optional[Dict[str, Any]]) -> List[str]:
         if not filters:
@@ -75,6 +113,45 @@ class Retriever:
                 filtered.append(cid)
         return filtered
 
+    def _merge_hits(
+        self,
+        scores: np.ndarray,
+        idxs: np.ndarray,
+        filters: Optional[Dict[str, Any]],
+        parva_boost: Optional[Dict[str, float]],
+    ) -> List[Dict[str, Any]]:
+        merged: Dict[str, Dict[str, Any]] = {}
+        for score, idx in zip(scores.flatten().tolist(), idxs.flatten().tolist()):
+            if idx < 0 or idx >= len(self.id_map):
+                continue
+            cid = self.id_map[idx]
+            chunk = self.chunk_lookup.get(cid)
+            if chunk is None:
+                continue
+
+            base_score = float(score)
+            if parva_boost and chunk.get("parva_name") in parva_boost:
+                base_score *= parva_boost[chunk["parva_name"]]
+
+            existing = merged.get(cid)
+            if existing is None or base_score > existing["score"]:
+                merged[cid] = {
+                    "chunk_id": cid,
+                    "score": base_score,
+                    "text": chunk.get("text", ""),
+                    "parva_number": chunk.get("parva_number"),
+                    "parva_name": chunk.get("parva_name"),
+                    "section_number": chunk.get("section_number"),
+                    "section_index": chunk.get("section_index"),
+                }
+
+        results = list(merged.values())
+        results.sort(key=lambda x: x["score"], reverse=True)
+        if filters:
+            filtered_ids = self._filter_ids([r["chunk_id"] for r in results], filters)
+            results = [r for r in results if r["chunk_id"] in filtered_ids]
+        return results
+
     def retrieve_expanded(
         self,
         query: str,
@@ -83,42 +160,45 @@ class Retriever:
         filters: Optional[Dict[str, Any]] = None,
         parva_boost: Optional[Dict[str, float]] = None,
     ) -> List[Dict[str, Any]]:
-        if not query.strip():
-            raise ValueError("Query must be non-empty")
+        return self.retrieve_batched(
+            [query],
+            expanded_queries=[expanded_queries],
+            top_k_stage1=top_k_stage1,
+            filters=filters,
+            parva_boosts=[parva_boost],
+        )[0]
 
-        queries = expanded_queries or [query]
-        merged: Dict[str, Dict[str, Any]] = {}
+    def retrieve_batched(
+        self,
+        queries: List[str],
+        expanded_queries: Optional[List[Optional[List[str]]]] = None,
+        top_k_stage1: int = 30,
+        filters: Optional[Dict[str, Any]] = None,
+        parva_boosts: Optional[List[Optional[Dict[str, float]]]] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Retrieve for several queries with one embedding batch and one index search.
 
-        for q in queries:
-            qvec = self._embed_query(q)
-            scores, idxs = self.index.search(qvec.reshape(1, -1), top_k_stage1)
-            for score, idx in zip(scores.flatten().tolist(), idxs.flatten().tolist()):
-                if idx < 0 or idx >= len(self.id_map):
-                    continue
-                cid = self.id_map[idx]
-                chunk = self.chunk_lookup.get(cid)
-                if chunk is None:
-                    continue
+        ``expanded_queries`` and ``parva_boosts`` are aligned with ``queries``;
+        returns one merged, score-sorted result list per query.
+        """
+        if any(not q.strip() for q in queries):
+            raise ValueError("Query must be non-empty")
+        if not queries:
+            return []
 
-                base_score = float(score)
-                if parva_boost and chunk.get("parva_name") in parva_boost:
-                    base_score *= parva_boost[chunk["parva_name"]]
-
-                existing = merged.get(cid)
-                if existing is None or base_score > existing["score"]:
-                    merged[cid] = {
-                        "chunk_id": cid,
-                        "score": base_score,
-                        "text": chunk.get("text", ""),
-                        "parva_number": chunk.get("parva_number"),
-                        "parva_name": chunk.get("parva_name"),
-                        "section_number": chunk.get("section_number"),
-                        "section_index": chunk.get("section_index"),
-                    }
+        expansions = expanded_queries or [None] * len(queries)
+        boosts = parva_boosts or [None] * len(queries)
+        if len(expansions) != len(queries) or len(boosts) != len(queries):
+            raise ValueError("expanded_queries and parva_boosts must align with queries")
 
-        results = list(merged.values())
-        results.sort(key=lambda x: x["score"], reverse=True)
-        if filters:
-            filtered_ids = self._filter_ids([r["chunk_id"] for r in results], filters)
-            results = [r for r in results if r["chunk_id"] in filtered_ids]
+        per_query = [self._dedupe_queries(exp or [q]) or [q] for q, exp in zip(queries, expansions)]
+        flat = [variant for variants in per_query for variant in variants]
+        scores, idxs = self.index.search(self._embed_queries(flat), top_k_stage1)
+
+        results: List[List[Dict[str, Any]]] = []
+        row = 0
+        for variants, boost in zip(per_query, boosts):
+            end = row + len(variants)
+            results.append(self._merge_hits(scores[row:end], idxs[row:end], filters, boost))
+            row = end
         return results
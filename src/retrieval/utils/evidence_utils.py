@@ -101,6 +101,45 @@ def chunk_tokens(text: str) -> set:
     return {t for t in re.findall(r"[a-zA-Z']+", text.lower()) if len(t) > 3 and t not in STOPWORDS}
 
 
+def _dilate_mask(mask: int, window: int) -> int:
+    """Spread every set bit of ``mask`` to its neighbours within ``window``."""
+    dilated = mask
+    for shift in range(1, window + 1):
+        dilated |= (mask << shift) | (mask >> shift)
+    return dilated
+
+
+def _score_chunk_for_death(
+    text: str,
+    target_l: str,
+    aliases_l: Sequence[str],
+    window: int,
+) -> Tuple[bool, bool, bool]:
+    """Score one chunk for death evidence.
+
+    Returns (death_hit, alias_hit, cooccur) for the lowercased target/aliases.
+    """
+    sentences = split_sentences(text.lower())
+
+    # Sentence indices packed into int bitmasks; "within window" becomes an AND
+    # against the other mask dilated by +/- window positions.
+    entity_mask = verb_mask = alias_mask = 0
+    for i, s in enumerate(sentences):
+        bit = 1 << i
+        if target_l in s:
+            entity_mask |= bit
+        if any(v in s for v in DEATH_VERBS):
+            verb_mask |= bit
+        if any(alias in s for alias in aliases_l):
+            alias_mask |= bit
+
+    death_hit = bool(entity_mask & _dilate_mask(verb_mask, window))
+    alias_hit = bool(alias_mask)
+    cooccur = death_hit and bool(entity_mask & _dilate_mask(alias_mask, window))
+
+    return death_hit, alias_hit, cooccur
+
+
 def aggregate_death_evidence(
     chunks: Sequence[Dict[str, object]],
     target_entity: str,
@@ -124,32 +163,11 @@ def aggregate_death_evidence(
     cooccur_chunks: List[Dict[str, object]] = []
 
     for chunk in list(chunks)[:top_n]:
-        text = str(chunk.get("text", ""))
-        lowered = text.lower()
-        sentences = split_sentences(lowered)
-
-        entity_idxs = [i for i, s in enumerate(sentences) if target_l in s]
-        verb_idxs = [i for i, s in enumerate(sentences) if any(v in s for v in DEATH_VERBS)]
-        alias_idxs = [i for i, s in enumerate(sentences) if any(alias in s for alias in aliases_l)]
-
-        death_hit = False
-        for ei in entity_idxs:
-            if any(abs(ei - vi) <= window for vi in verb_idxs):
-                death_hit = True
-                break
+        death_hit, alias_hit, cooccur = _score_chunk_for_death(str(chunk.get("text", "")), target_l, aliases_l, window)
         if death_hit:
             death_chunks.append(chunk)
-
-        alias_hit = bool(alias_idxs)
         if alias_hit:
             agent_chunks.append(chunk)
-
-        cooccur = False
-        if death_hit and alias_hit:
-            for ei in entity_idxs:
-                if any(abs(ei - ai) <= window for ai in alias_idxs):
-                    cooccur = True
-                    break
         if cooccur:
             cooccur_chunks.append(chunk)
 
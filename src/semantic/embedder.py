@@ -1,12 +1,35 @@
+import contextlib
+import gc
 import logging
-from typing import List, Optional
+import threading
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import torch
 from sentence_transformers import SentenceTransformer
 
+from .progress import maybe_tqdm, progress_enabled
+
 logger = logging.getLogger(__name__)
 
+# Token-length buckets for embed_texts; longer inputs share one overflow bucket.
+TOKEN_BUCKETS: Tuple[int, ...] = (64, 128, 256, 512)
+
+# Inference precisions; reduced precision only applies on CUDA devices.
+PRECISION_DTYPES: Dict[str, Optional[torch.dtype]] = {
+    "fp32": None,
+    "fp16": torch.float16,
+    "bf16": torch.bfloat16,
+}
+
+# torch.compile(mode="reduce-overhead") needs torch>=2.1 for CUDA graph capture.
+_TORCH_VERSION: Tuple[int, ...] = tuple(int(p) for p in torch.__version__.split("+")[0].split(".")[:2])
+COMPILE_MIN_TORCH: Tuple[int, int] = (2, 1)
+
+# Inputs longer than the last bucket are padded up to a multiple of this, so
+# compiled graphs see a bounded set of shapes.
+OVERFLOW_PAD_MULTIPLE = 128
+
 
 class Embedder:
     """
@@ -14,20 +37,31 @@ class Embedder:
 
     - Automatically uses GPU on Google Colab if available
     - Falls back to CPU otherwise
+    - Optional fp16/bf16 inference on CUDA (outputs stay float32)
+    - Optional torch.compile on CUDA for embed_texts_pretokenized
     - Safe for large batch embedding in Phase 2
+    - Thread-safe: calls are serialized, since the shared fast tokenizer
+      keeps its padding/truncation settings as mutable state
     """
 
     def __init__(
         self,
         model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
         device: Optional[str] = None,
+        precision: str = "fp32",
+        compile_model: bool = False,
     ) -> None:
+        if precision not in PRECISION_DTYPES:
+            raise ValueError(f"Unsupported precision {precision!r}; expected one of {sorted(PRECISION_DTYPES)}")
+
         # 🔹 Auto-detect device if not explicitly provided
         if device is None:
             device = "cuda" if torch.cuda.is_available() else "cpu"
 
         self.device = device
         self.model_name = model_name
+        # Reentrant: embed_texts_pretokenized falls back to embed_texts.
+        self._lock = threading.RLock()
 
         logger.info("Initializing embedding model")
         logger.info("Model: %s", model_name)
@@ -37,50 +71,241 @@ class Embedder:
             model_name,
             device=device
         )
+        self.model.eval()  # inference only: dropout off
+
+        if precision != "fp32" and not device.startswith("cuda"):
+            logger.warning("Precision %s requested on %s; using fp32", precision, device)
+            precision = "fp32"
+        self.precision = precision
+        if precision == "fp16":
+            self.model.half()
+        elif precision == "bf16":
+            self.model.bfloat16()
 
         self.dimension = int(self.model.get_sentence_embedding_dimension())
 
+        self.compiled = False
+        if compile_model:
+            self.compiled = self._compile()
+
         logger.info(
-            "Loaded embedding model %s (dim=%d) on %s",
+            "Loaded embedding model %s (dim=%d) on %s [%s]",
             self.model_name,
             self.dimension,
             self.device,
+            self.precision,
         )
 
+    def _compile(self, warmup_batch_size: int = 32) -> bool:
+        """
+        Compile the transformer with CUDA graphs and capture one graph per bucket.
+
+        Only embed_texts_pretokenized pads to fixed bucket shapes, so it is
+        the path that benefits; encode()-based calls still work but may
+        recompile on new shapes.
+        """
+        if not self.device.startswith("cuda"):
+            logger.info("torch.compile skipped on %s", self.device)
+            return False
+        if _TORCH_VERSION < COMPILE_MIN_TORCH:
+            logger.warning("torch.compile needs torch>=%d.%d; running eagerly", *COMPILE_MIN_TORCH)
+            return False
+
+        module = self.model[0]
+        auto_model = getattr(module, "auto_model", None)
+        if auto_model is None:
+            logger.warning("Model %s has no transformer module to compile; running eagerly", self.model_name)
+            return False
+        if hasattr(auto_model, "compile"):  # torch>=2.2 compiles in place
+            auto_model.compile(mode="reduce-overhead", dynamic=False)
+        else:
+            module.auto_model = torch.compile(auto_model, mode="reduce-overhead", dynamic=False)
+
+        # Capture graphs here, on the thread that will run inference.
+        tokenizer = self.model.tokenizer
+        with torch.inference_mode(), self._autocast():
+            for bound in TOKEN_BUCKETS:
+                if bound > self.model.max_seq_length:
+                    break
+                features = tokenizer(
+                    ["x " * bound] * warmup_batch_size,
+                    padding="max_length",
+                    truncation=True,
+                    max_length=bound,
+                    return_tensors="pt",
+                )
+                self.model({k: v.to(self.device) for k, v in features.items()})
+        logger.info("Compiled %s with torch.compile (reduce-overhead)", self.model_name)
+        return True
+
+    def _autocast(self):
+        dtype = PRECISION_DTYPES[self.precision]
+        return torch.autocast("cuda", dtype=dtype) if dtype is not None else contextlib.nullcontext()
+
+    def _encode(
+        self, texts: List[str], batch_size: int, show_progress_bar: bool, as_tensor: bool = False
+    ) -> Union[np.ndarray, torch.Tensor]:
+        with torch.inference_mode(), self._autocast():
+            embeddings = self.model.encode(
+                texts,
+                batch_size=batch_size,
+                convert_to_numpy=not as_tensor,
+                convert_to_tensor=as_tensor,
+                show_progress_bar=show_progress_bar and progress_enabled(),
+                normalize_embeddings=False,
+            )
+        if as_tensor:
+            return embeddings.float()
+        return embeddings.astype(np.float32, copy=False)
+
     def embed_texts(
         self,
         texts: List[str],
         batch_size: int = 32,
-    ) -> List[np.ndarray]:
+        show_progress_bar: bool = True,
+        as_tensor: bool = False,
+    ) -> Union[np.ndarray, torch.Tensor]:
         """
         Embed a list of texts.
 
+        Args:
+            as_tensor: Return a float32 torch.Tensor left on the model's device
+                instead of copying the vectors to host memory.
+
         Returns:
-            List[np.ndarray] with dtype float32
+            np.ndarray (or torch.Tensor) of shape (len(texts), dimension), dtype float32
         """
-        if not texts:
-            return []
+        with self._lock:
+            if as_tensor:
+                return self._embed_texts_tensor(texts, batch_size, show_progress_bar)
+            if not texts:
+                return np.empty((0, self.dimension), dtype=np.float32)
+
+            out = np.empty((len(texts), self.dimension), dtype=np.float32)
+            for idxs in self._length_buckets(self._token_lengths(texts)):
+                out[idxs] = self._encode(
+                    [texts[i] for i in idxs],
+                    batch_size=batch_size,
+                    show_progress_bar=show_progress_bar,  # ✅ Useful on Colab
+                )
+            return out
+
+    def _embed_texts_tensor(self, texts: List[str], batch_size: int, show_progress_bar: bool) -> torch.Tensor:
+        with torch.inference_mode():
+            out = torch.empty((len(texts), self.dimension), dtype=torch.float32, device=self.device)
+            if not texts:
+                return out
+            for idxs in self._length_buckets(self._token_lengths(texts)):
+                out[torch.as_tensor(idxs, device=self.device)] = self._encode(
+                    [texts[i] for i in idxs],
+                    batch_size=batch_size,
+                    show_progress_bar=show_progress_bar,
+                    as_tensor=True,
+                )
+        return out
 
-        embeddings = self.model.encode(
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        encoded = self.model.tokenizer(
             texts,
-            batch_size=batch_size,
-            convert_to_numpy=True,
-            show_progress_bar=True,  # ✅ Useful on Colab
-            normalize_embeddings=False,
+            truncation=True,
+            max_length=self.model.max_seq_length,
+            add_special_tokens=True,
+            return_length=True,
         )
+        return list(encoded["length"])
 
-        # SentenceTransformer returns ndarray for list input
-        return [np.asarray(vec, dtype=np.float32) for vec in embeddings]
+    def _length_buckets(self, lengths: List[int]) -> List[List[int]]:
+        """
+        Group text indices into fixed token-length buckets.
+
+        Batches never mix short and long inputs, so padding stays within a
+        bucket and batch shapes repeat across calls. Indices inside a bucket
+        are sorted by token length.
+        """
+        buckets: Dict[int, List[int]] = {}
+        for i, length in enumerate(lengths):
+            buckets.setdefault(self._bucket_bound(length), []).append(i)
+        return [sorted(buckets[bound], key=lengths.__getitem__) for bound in sorted(buckets)]
+
+    def _bucket_bound(self, length: int) -> int:
+        return next((b for b in TOKEN_BUCKETS if b >= length), self.model.max_seq_length)
+
+    def _pad_kwargs(self, max_len: int) -> Dict:
+        """Padding for one batch: fixed bucket shapes when compiled, longest otherwise."""
+        if not self.compiled:
+            return {"padding": "longest"}
+        bound = self._bucket_bound(max_len)
+        if bound > TOKEN_BUCKETS[-1]:
+            return {"padding": "longest", "pad_to_multiple_of": OVERFLOW_PAD_MULTIPLE}
+        return {"padding": "max_length", "max_length": bound}
+
+    def embed_texts_pretokenized(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = True,
+    ) -> np.ndarray:
+        """
+        Embed a list of texts, tokenizing the whole list once up front.
+
+        The fast (Rust) tokenizer encodes every text in one call; batches are
+        then padded from the cached ids and run through the model's own
+        modules, so pooling matches encode(). Falls back to embed_texts when
+        the tokenizer is not a fast tokenizer.
+
+        Returns:
+            np.ndarray of shape (len(texts), dimension), dtype float32
+        """
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        with self._lock:
+            tokenizer = self.model.tokenizer
+            if not getattr(tokenizer, "is_fast", False):
+                logger.warning("Tokenizer for %s is not a fast tokenizer; using embed_texts", self.model_name)
+                return self.embed_texts(texts, batch_size=batch_size, show_progress_bar=show_progress_bar)
+
+            input_ids = tokenizer(
+                texts,
+                padding=False,
+                truncation=True,
+                max_length=self.model.max_seq_length,
+                return_attention_mask=False,
+                return_token_type_ids=False,
+            )["input_ids"]
+
+            batches = [
+                idxs[start:start + batch_size]
+                for idxs in self._length_buckets([len(ids) for ids in input_ids])
+                for start in range(0, len(idxs), batch_size)
+            ]
+
+            out = np.empty((len(texts), self.dimension), dtype=np.float32)
+            with torch.inference_mode(), self._autocast():
+                for batch in (maybe_tqdm(batches, desc="Batches") if show_progress_bar else batches):
+                    batch_ids = [input_ids[i] for i in batch]
+                    features = tokenizer.pad(
+                        {"input_ids": batch_ids},
+                        return_tensors="pt",
+                        **self._pad_kwargs(max(map(len, batch_ids))),
+                    )
+                    features = {k: v.to(self.device) for k, v in features.items()}
+                    embeddings = self.model(features)["sentence_embedding"]
+                    out[batch] = embeddings.float().cpu().numpy()
+            return out
+
+    def release_memory(self) -> None:
+        """
+        Collect garbage and return cached CUDA blocks to the driver.
+        """
+        gc.collect()
+        if self.device.startswith("cuda"):
+            torch.cuda.empty_cache()
 
     def embed_text(self, text: str) -> np.ndarray:
         """
         Embed a single text.
         """
-        emb = self.model.encode(
-            [text],
-            batch_size=1,
-            convert_to_numpy=True,
-            show_progress_bar=False,
-            normalize_embeddings=False,
-        )
-        return np.asarray(emb[0], dtype=np.float32)
+        with self._lock:
+            emb = self._encode([text], batch_size=1, show_progress_bar=False)
+        return emb[0]
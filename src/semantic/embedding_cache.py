@@ -0,0 +1,114 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Union
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+# Stay well under SQLite's bound-parameter limit (999 on older builds).
+_LOOKUP_BATCH = 500
+
+
+class CachedEmbedder:
+    """
+    Persistent embedding cache in front of an Embedder.
+
+    - Vectors are keyed by sha256(model_name, text) and stored as float32
+      blobs in a single SQLite file
+    - Batched calls embed only the cache misses and stitch results back in
+      input order
+    - Hits and misses return the exact float32 vectors the embedder produced,
+      so chunk boundaries match an uncached run
+    - Any other attribute is delegated to the wrapped embedder
+    """
+
+    def __init__(self, embedder, cache_path: Path) -> None:
+        self.embedder = embedder
+        self.cache_path = Path(cache_path)
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # Shared across chunking threads; every access goes through _lock.
+        self._conn = sqlite3.connect(str(self.cache_path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self.hits = 0
+        self.misses = 0
+        logger.info("Embedding cache enabled at %s", self.cache_path)
+
+    def __getattr__(self, name: str):
+        if name == "embedder":
+            raise AttributeError(name)
+        return getattr(self.embedder, name)
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.embedder.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        keys = list(keys)
+        found: Dict[str, np.ndarray] = {}
+        row_bytes = self.embedder.dimension * np.dtype(np.float32).itemsize
+        for start in range(0, len(keys), _LOOKUP_BATCH):
+            batch = keys[start:start + _LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+            for key, blob in rows:
+                # Blobs of any other size (e.g. float16 rows from older caches) count as misses.
+                if len(blob) == row_bytes:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def _cached(self, texts: List[str], embed_fn: Callable[..., np.ndarray], **kwargs) -> np.ndarray:
+        out = np.empty((len(texts), self.embedder.dimension), dtype=np.float32)
+        if not texts:
+            return out
+
+        keys = [self._key(t) for t in texts]
+        found = self._lookup(set(keys))
+        missed = sum(1 for k in keys if k not in found)
+
+        missing = list(dict.fromkeys(t for t, k in zip(texts, keys) if k not in found))
+        if missing:
+            fresh = np.asarray(embed_fn(missing, **kwargs), dtype=np.float32)
+            rows = [(self._key(t), vec.tobytes()) for t, vec in zip(missing, fresh)]
+            with self._lock, self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+            found.update((key, vec) for (key, _), vec in zip(rows, fresh))
+
+        for i, key in enumerate(keys):
+            out[i] = found[key]
+        with self._lock:
+            self.hits += len(texts) - missed
+            self.misses += missed
+        return out
+
+    def embed_texts(
+        self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = True, as_tensor: bool = False
+    ) -> Union[np.ndarray, torch.Tensor]:
+        out = self._cached(
+            texts, self.embedder.embed_texts, batch_size=batch_size, show_progress_bar=show_progress_bar
+        )
+        # Cached vectors live on the host; move them once to match Embedder.embed_texts(as_tensor=True).
+        return torch.from_numpy(out).to(self.embedder.device) if as_tensor else out
+
+    def embed_texts_pretokenized(
+        self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = True
+    ) -> np.ndarray:
+        return self._cached(
+            texts, self.embedder.embed_texts_pretokenized, batch_size=batch_size, show_progress_bar=show_progress_bar
+        )
+
+    def embed_text(self, text: str) -> np.ndarray:
+        return self.embed_texts([text], batch_size=1, show_progress_bar=False)[0]
+
+    def close(self) -> None:
+        logger.info("Embedding cache: %d hits, %d misses", self.hits, self.misses)
+        with self._lock:
+            self._conn.close()
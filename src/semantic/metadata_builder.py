@@ -1,58 +1,77 @@
 import hashlib
-import statistics
+from collections import defaultdict
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+
+# Change-detection digests are stored as "<algorithm>:<hexdigest>".
+DIGEST_ALGORITHM = "sha256"
+_READ_CHUNK = 1 << 20
 
 
 def sha256_file(path: str) -> str:
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
+    with open(path, "rb", buffering=0) as f:
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+: read loop runs in C
+            return hashlib.file_digest(f, DIGEST_ALGORITHM).hexdigest()
+        h = hashlib.sha256()
+        for chunk in iter(lambda: f.read(_READ_CHUNK), b""):
             h.update(chunk)
-    return h.hexdigest()
+        return h.hexdigest()
+
 
+def input_digest(path: str) -> str:
+    return f"{DIGEST_ALGORITHM}:{sha256_file(path)}"
 
-def build_chunk_metadata(
+
+def build_chunk_summaries(
     chunks: List[Dict],
     input_path: str,
     model_name: str,
     tokenizer_name: str,
     token_limits: Dict,
-) -> Dict:
-    parva_counts: Dict[str, int] = {}
+    digest: Optional[str] = None,
+) -> Tuple[Dict, Dict]:
+    """Build (chunk_metadata, chunk_stats) payloads in a single pass over chunks."""
+    per_parva: Dict[str, Dict[str, int]] = defaultdict(lambda: {"chunks": 0, "tokens": 0})
+    total_tokens = 0
+    min_tokens: Optional[int] = None
+    max_tokens: Optional[int] = None
     for chunk in chunks:
-        name = chunk.get("parva_name", "Unknown")
-        parva_counts[name] = parva_counts.get(name, 0) + 1
+        tok = chunk.get("token_count", 0)
+        entry = per_parva[chunk.get("parva_name", "Unknown")]
+        entry["chunks"] += 1
+        entry["tokens"] += tok
+        total_tokens += tok
+        if min_tokens is None or tok < min_tokens:
+            min_tokens = tok
+        if max_tokens is None or tok > max_tokens:
+            max_tokens = tok
+
+    count = len(chunks)
+    if count:
+        # Same value statistics.mean gives for ints: int when exact, float otherwise.
+        avg_tokens = total_tokens // count if total_tokens % count == 0 else total_tokens / count
+    else:
+        avg_tokens = 0
+    per_parva = dict(per_parva)
 
-    return {
+    metadata = {
         "created_at": datetime.utcnow().isoformat(),
-        "input_hash": sha256_file(input_path),
+        "input_digest": digest or input_digest(input_path),
         "input_file": input_path,
-        "chunk_count": len(chunks),
-        "parva_chunk_counts": parva_counts,
+        "chunk_count": count,
+        "parva_chunk_counts": {name: entry["chunks"] for name, entry in per_parva.items()},
         "model": model_name,
         "tokenizer": tokenizer_name,
         "token_limits": token_limits,
         "source": "KM Ganguly",
         "language": "English",
     }
-
-
-def build_chunk_stats(chunks: List[Dict]) -> Dict:
-    token_counts = [c.get("token_count", 0) for c in chunks]
-    total_tokens = sum(token_counts)
-    per_parva: Dict[str, Dict[str, int]] = {}
-    for chunk in chunks:
-        name = chunk.get("parva_name", "Unknown")
-        per_parva.setdefault(name, {"chunks": 0, "tokens": 0})
-        per_parva[name]["chunks"] += 1
-        per_parva[name]["tokens"] += chunk.get("token_count", 0)
-
-    return {
-        "total_chunks": len(chunks),
+    stats = {
+        "total_chunks": count,
         "total_tokens": total_tokens,
-        "min_tokens": min(token_counts) if token_counts else 0,
-        "max_tokens": max(token_counts) if token_counts else 0,
-        "avg_tokens": statistics.mean(token_counts) if token_counts else 0,
+        "min_tokens": min_tokens if min_tokens is not None else 0,
+        "max_tokens": max_tokens if max_tokens is not None else 0,
+        "avg_tokens": avg_tokens,
         "per_parva": per_parva,
     }
+    return metadata, stats
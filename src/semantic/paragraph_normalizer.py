@@ -1,41 +1,45 @@
 import re
+from functools import lru_cache
 from typing import List
 
+# Inputs up to this length are memoized; boilerplate header/footer lines repeat
+# across the whole corpus, long paragraphs almost never do.
+_CACHE_MAX_CHARS = 256
+
 
 class ParagraphNormalizer:
     """Normalize paragraph text without summarization or reordering."""
 
-    _header_patterns = [
-        re.compile(r"^table of contents.*$", re.IGNORECASE),
-        re.compile(r"^index\b.*$", re.IGNORECASE),
-        re.compile(r"^downloaded from:.*$", re.IGNORECASE),
-        re.compile(r"^file:///.*$", re.IGNORECASE),
-    ]
+    # Any whitespace run (newlines included) collapses to a single space.
+    _RE_WS = re.compile(r"\s+")
+    # Leftover nav/header/footer noise at the start of a paragraph.
+    _RE_HEADER = re.compile(
+        r"(?:table of contents|index\b|downloaded from:|file:///)",
+        re.IGNORECASE,
+    )
 
     @staticmethod
     def normalize(text: str) -> str:
         if not text:
             return ""
+        if len(text) <= _CACHE_MAX_CHARS:
+            return _normalize_cached(text)
+        return _normalize_impl(text)
 
-        # Replace intra-line breaks with spaces, keep paragraph boundaries external to this function.
-        cleaned = text.replace("\r", "")
-        cleaned = re.sub(r"\s+\n\s+", " ", cleaned)
-        cleaned = re.sub(r"\n", " ", cleaned)
-        cleaned = re.sub(r"\s+", " ", cleaned).strip()
+    @staticmethod
+    def normalize_paragraphs(paragraphs: List[str]) -> List[str]:
+        normalize = ParagraphNormalizer.normalize
+        return [norm for norm in map(normalize, paragraphs) if norm]
 
-        # Remove leftover nav/header/footer noise at the start of the paragraph.
-        for pattern in ParagraphNormalizer._header_patterns:
-            if pattern.match(cleaned):
-                cleaned = ""
-                break
 
-        return cleaned
+def _normalize_impl(text: str) -> str:
+    # Replace intra-line breaks with spaces, keep paragraph boundaries external to this function.
+    cleaned = ParagraphNormalizer._RE_WS.sub(" ", text.replace("\r", "")).strip()
 
-    @staticmethod
-    def normalize_paragraphs(paragraphs: List[str]) -> List[str]:
-        normalized: List[str] = []
-        for para in paragraphs:
-            norm = ParagraphNormalizer.normalize(para)
-            if norm:
-                normalized.append(norm)
-        return normalized
+    if ParagraphNormalizer._RE_HEADER.match(cleaned):
+        return ""
+
+    return cleaned
+
+
+_normalize_cached = lru_cache(maxsize=4096)(_normalize_impl)
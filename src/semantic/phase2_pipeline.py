@@ -4,12 +4,20 @@ import json
 import logging
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Tuple
 
-from tqdm import tqdm
+import numpy as np
+import orjson
 from transformers import AutoTokenizer
 
+try:
+    import ijson
+    _has_ijson = True
+except ImportError:
+    _has_ijson = False
+
 # Support execution as a script (python src/semantic/phase2_pipeline.py)
 if __package__ is None or __package__ == "":
     # Add the src/ directory to sys.path so that "import semantic" works
@@ -17,17 +25,26 @@ if __package__ is None or __package__ == "":
     if str(src_dir) not in sys.path:
         sys.path.append(str(src_dir))
     from semantic.embedder import Embedder
-    from semantic.metadata_builder import build_chunk_metadata, build_chunk_stats, sha256_file
+    from semantic.embedding_cache import CachedEmbedder
+    from semantic.progress import maybe_tqdm
+    from semantic.metadata_builder import build_chunk_summaries, input_digest
     from semantic.semantic_chunker import SemanticChunker
-    from semantic.validators import ChunkValidator
+    from semantic.validators import ChunksView, ChunkValidator
 else:
     from .embedder import Embedder
-    from .metadata_builder import build_chunk_metadata, build_chunk_stats, sha256_file
+    from .embedding_cache import CachedEmbedder
+    from .progress import maybe_tqdm
+    from .metadata_builder import build_chunk_summaries, input_digest
     from .semantic_chunker import SemanticChunker
-    from .validators import ChunkValidator
+    from .validators import ChunksView, ChunkValidator
 
 logger = logging.getLogger(__name__)
 
+# Row i of the embedding matrix belongs to embedding_manifest["chunk_ids"][i].
+EMBEDDINGS_FILE = "embeddings.npy"
+# Opt-in persistent embedding cache (MAHABHARAT_EMBED_CACHE=1), kept next to the outputs.
+EMBED_CACHE_FILE = "embedding_cache.sqlite3"
+
 
 def load_structure(path: str) -> List[Dict]:
     with open(path, "r", encoding="utf-8") as f:
@@ -35,23 +52,31 @@ def load_structure(path: str) -> List[Dict]:
     return data.get("mahabharata", {}).get("parvas", [])
 
 
+def iter_parvas(path: str) -> Iterator[Dict]:
+    """Yield parvas one at a time without holding the whole structure in memory."""
+    if not _has_ijson:
+        yield from load_structure(path)
+        return
+    with open(path, "rb") as f:
+        yield from ijson.items(f, "mahabharata.parvas.item", use_float=True)
+
+
 def write_jsonl(path: Path, rows: List[Dict]) -> None:
-    with path.open("w", encoding="utf-8") as f:
-        for row in rows:
-            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    with path.open("wb") as f:
+        f.writelines(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in rows)
 
 
 def write_json(path: Path, payload: Dict) -> None:
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
+    with path.open("wb") as f:
+        f.write(orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY))
 
 
 def load_chunks(path: Path) -> List[Dict]:
     chunks: List[Dict] = []
-    with path.open("r", encoding="utf-8") as f:
+    with path.open("rb") as f:
         for line in f:
             if line.strip():
-                chunks.append(json.loads(line))
+                chunks.append(orjson.loads(line))
     return chunks
 
 
@@ -60,15 +85,32 @@ def load_embedding_manifest(path: Path) -> Dict:
         return json.load(f)
 
 
-def build_embedding_manifest(model_name: str, dimension: int, embeddings: List[List[float]], chunk_ids: List[str]) -> Dict:
-    records = []
-    for cid, emb in zip(chunk_ids, embeddings):
-        records.append({"chunk_id": cid, "embedding": emb})
+def load_embeddings(manifest_path: Path, manifest: Dict) -> np.ndarray:
+    """Memory-map the embedding matrix referenced by a manifest.
+
+    Manifests written before embeddings.npy carry one inline vector per chunk;
+    they are still read here, and outputs_exist() makes the next run re-embed.
+    """
+    if "embeddings_file" in manifest:
+        return np.load(manifest_path.parent / manifest["embeddings_file"], mmap_mode="r")
+    if "chunks" in manifest:
+        logger.warning("Legacy embedding manifest with inline vectors: %s; re-run Phase 2 to write %s", manifest_path, EMBEDDINGS_FILE)
+        return np.array([rec["embedding"] for rec in manifest["chunks"]], dtype=np.float32)
+    raise ValueError(f"Embedding manifest {manifest_path} references no embeddings; re-run Phase 2")
+
+
+def write_embeddings(path: Path, embeddings: np.ndarray) -> None:
+    np.save(path, embeddings.astype(np.float16))
+
+
+def build_embedding_manifest(model_name: str, dimension: int, chunk_ids: List[str], embeddings_file: str = EMBEDDINGS_FILE) -> Dict:
     return {
         "model": model_name,
         "dimension": dimension,
-        "count": len(records),
-        "chunks": records,
+        "dtype": "float16",
+        "count": len(chunk_ids),
+        "embeddings_file": embeddings_file,
+        "chunk_ids": chunk_ids,
     }
 
 
@@ -78,23 +120,49 @@ def outputs_exist(output_dir: Path) -> bool:
         output_dir / "chunk_metadata.json",
         output_dir / "chunk_stats.json",
         output_dir / "embedding_manifest.json",
+        output_dir / EMBEDDINGS_FILE,
     ]
     return all(p.exists() for p in required)
 
 
-def load_parva_checkpoint(path: Path) -> Dict:
-    if not path.exists():
-        return {"processed_parvas": [], "intermediate_chunks": []}
-    try:
-        with path.open("r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {"processed_parvas": [], "intermediate_chunks": []}
+def load_parva_progress(progress_path: Path, chunks_path: Path) -> Tuple[Dict, List[Dict]]:
+    """Load parva resume state and the chunks committed so far.
 
+    Rows appended after the last recorded byte offset belong to a parva that
+    was interrupted mid-write; they are truncated so that parva reruns cleanly.
+    """
+    progress: Dict = {"processed_parvas": [], "chunks_bytes": 0}
+    if progress_path.exists():
+        try:
+            with progress_path.open("r", encoding="utf-8") as f:
+                progress = json.load(f)
+        except Exception:
+            pass
 
-def save_parva_checkpoint(path: Path, payload: Dict) -> None:
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=2, ensure_ascii=False)
+    committed = int(progress.get("chunks_bytes", 0))
+    if not chunks_path.exists() or chunks_path.stat().st_size < committed:
+        progress = {"processed_parvas": [], "chunks_bytes": 0}
+        committed = 0
+
+    chunks: List[Dict] = []
+    if chunks_path.exists():
+        with chunks_path.open("r+b") as f:
+            f.truncate(committed)
+            for line in f:
+                if line.strip():
+                    chunks.append(orjson.loads(line))
+    return progress, chunks
+
+
+def append_parva_chunks(chunks_path: Path, progress_path: Path, progress: Dict, parva_chunks: List[Dict]) -> None:
+    """Append one parva's chunks, then atomically record the new committed offset."""
+    with chunks_path.open("ab") as f:
+        f.writelines(orjson.dumps(c, option=orjson.OPT_APPEND_NEWLINE) for c in parva_chunks)
+        progress["chunks_bytes"] = f.tell()
+    tmp_path = progress_path.with_suffix(".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(progress, f, indent=2)
+    os.replace(tmp_path, progress_path)
 
 
 def load_checkpoint(path: Path) -> Dict:
@@ -112,9 +180,25 @@ def save_checkpoint(path: Path, payload: Dict) -> None:
         json.dump(payload, f, indent=2, ensure_ascii=False)
 
 
-def is_up_to_date(checkpoint: Dict, input_hash: str, model_name: str) -> bool:
+def _file_fingerprint(path: Path) -> List[int]:
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def resolve_input_digest(checkpoint: Dict, input_path: Path, fingerprint: List[int]) -> str:
+    """Reuse the checkpointed digest when size and mtime are unchanged; hash otherwise."""
+    stored = checkpoint.get("input_digest")
+    if stored and checkpoint.get("input_fingerprint") == fingerprint:
+        return stored
+    return input_digest(str(input_path))
+
+
+def is_up_to_date(checkpoint: Dict, digest: str, model_name: str) -> bool:
+    stored = checkpoint.get("input_digest")
+    if stored is None and checkpoint.get("input_hash"):
+        stored = f"sha256:{checkpoint['input_hash']}"  # pre-digest checkpoints
     return (
-        checkpoint.get("input_hash") == input_hash
+        stored == digest
         and checkpoint.get("model_name") == model_name
         and checkpoint.get("status") == "complete"
     )
@@ -129,6 +213,9 @@ def run_pipeline(
     verbose: bool,
     force: bool,
     similarity_threshold: float,
+    precision: str = "fp32",
+    compile_model: bool = False,
+    workers: int = 1,
 ) -> None:
     log_level = logging.DEBUG if verbose else logging.WARNING
     logging.basicConfig(level=log_level, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -142,19 +229,28 @@ def run_pipeline(
 
     checkpoint_path = output_path / "phase2_checkpoint.json"
     checkpoint = load_checkpoint(checkpoint_path)
-    input_hash = sha256_file(str(input_path))
 
     if validate_only:
         logger.info("Running validation-only mode")
         _validate_outputs(output_path, input_file)
         return
 
-    if outputs_exist(output_path) and is_up_to_date(checkpoint, input_hash, model_name) and not force:
+    fingerprint = _file_fingerprint(input_path)
+    digest = resolve_input_digest(checkpoint, input_path, fingerprint)
+
+    if outputs_exist(output_path) and is_up_to_date(checkpoint, digest, model_name) and not force:
         logger.info("Outputs are up-to-date; skipping recomputation")
         return
 
+    if workers > 1 and compile_model:
+        # CUDA graphs are captured per thread; concurrent chunking threads would re-capture them.
+        logger.warning("--workers %d disables torch.compile of the embedding model", workers)
+        compile_model = False
+
     tokenizer = AutoTokenizer.from_pretrained(model_name)
-    embedder = Embedder(model_name=model_name)
+    embedder = Embedder(model_name=model_name, precision=precision, compile_model=compile_model)
+    if os.getenv("MAHABHARAT_EMBED_CACHE") == "1":
+        embedder = CachedEmbedder(embedder, output_path / EMBED_CACHE_FILE)
 
     # Cap max_tokens at tokenizer's model_max_length to avoid indexing errors
     tokenizer_max = getattr(tokenizer, 'model_max_length', 8192)
@@ -172,56 +268,68 @@ def run_pipeline(
     )
 
     logger.info("Loading structure and chunking...")
-    parvas = load_structure(str(input_path))
-    
-    parva_checkpoint_path = output_path / "parva_checkpoint.json"
-    parva_checkpoint = load_parva_checkpoint(parva_checkpoint_path)
-    processed_parva_numbers = set(parva_checkpoint.get("processed_parvas", []))
-    intermediate_chunks = parva_checkpoint.get("intermediate_chunks", [])
-    
-    for parva in tqdm(parvas, desc="Chunking Parvas", unit="parva"):
+    parva_progress_path = output_path / "parva_progress.json"
+    parva_chunks_path = output_path / "parva_chunks.jsonl"
+    parva_progress, intermediate_chunks = load_parva_progress(parva_progress_path, parva_chunks_path)
+    processed_parva_numbers = set(parva_progress.get("processed_parvas", []))
+
+    pending_parvas = (p for p in iter_parvas(str(input_path)) if p.get("parva_number") not in processed_parva_numbers)
+    for parva, parva_chunks in maybe_tqdm(
+        chunker.iter_chunked_parvas(pending_parvas, max_workers=workers), desc="Chunking Parvas", unit="parva"
+    ):
         parva_num = parva.get("parva_number")
-        if parva_num in processed_parva_numbers:
-            continue
-        parva_chunks = chunker._chunk_parva(parva)
         intermediate_chunks.extend(parva_chunks)
         processed_parva_numbers.add(parva_num)
-        parva_checkpoint["processed_parvas"] = sorted(list(processed_parva_numbers))
-        parva_checkpoint["intermediate_chunks"] = intermediate_chunks
-        save_parva_checkpoint(parva_checkpoint_path, parva_checkpoint)
-    
+        parva_progress["processed_parvas"] = sorted(list(processed_parva_numbers))
+        append_parva_chunks(parva_chunks_path, parva_progress_path, parva_progress, parva_chunks)
+        embedder.release_memory()  # drop the chunker's per-parva embedding activations
+
     chunks = intermediate_chunks
 
-    ChunkValidator.validate_chunks(chunks, min_tokens=120, max_tokens=800)
-    ChunkValidator.log_stats(chunks)
+    chunks_view = ChunksView.from_chunks(chunks)
+    ChunkValidator.validate_chunks(chunks_view, min_tokens=120, max_tokens=800)
+    ChunkValidator.log_stats(chunks_view)
 
     texts = [c["text"] for c in chunks]
-    embeddings_np = embedder.embed_texts(texts)
+    embeddings_np = embedder.embed_texts_pretokenized(texts)
+    # Peak memory sits here, before outputs are serialized; drop what is no longer needed.
+    del texts
+    embedder.release_memory()
+    if isinstance(embedder, CachedEmbedder):
+        embedder.close()  # no embedding happens past this point
     ChunkValidator.validate_embeddings(chunks, embeddings_np)
 
-    embeddings = [emb.tolist() for emb in embeddings_np]
-    manifest = build_embedding_manifest(embedder.model_name, embedder.dimension, embeddings, [c["chunk_id"] for c in chunks])
+    manifest = build_embedding_manifest(embedder.model_name, embedder.dimension, [c["chunk_id"] for c in chunks])
 
-    metadata = build_chunk_metadata(
+    metadata, stats = build_chunk_summaries(
         chunks=chunks,
         input_path=str(input_path),
+        digest=digest,
         model_name=embedder.model_name,
         tokenizer_name=tokenizer.name_or_path,
         token_limits={"target": 450, "min": 120, "max": 800},
     )
-    stats = build_chunk_stats(chunks)
 
     if dry_run:
         logger.info("Dry run enabled; outputs will not be written")
         return
 
-    write_jsonl(output_path / "chunks.jsonl", chunks)
-    write_json(output_path / "chunk_metadata.json", metadata)
-    write_json(output_path / "chunk_stats.json", stats)
-    write_json(output_path / "embedding_manifest.json", manifest)
+    # Output files are independent; overlap their serialization and disk writes.
+    # The checkpoint below is only saved once every write has succeeded.
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [
+            pool.submit(write_jsonl, output_path / "chunks.jsonl", chunks),
+            pool.submit(write_json, output_path / "chunk_metadata.json", metadata),
+            pool.submit(write_json, output_path / "chunk_stats.json", stats),
+            pool.submit(write_embeddings, output_path / EMBEDDINGS_FILE, embeddings_np),
+            pool.submit(write_json, output_path / "embedding_manifest.json", manifest),
+        ]
+        for future in futures:
+            future.result()
 
     checkpoint = {
-        "input_hash": input_hash,
+        "input_digest": digest,
+        "input_fingerprint": fingerprint,
         "model_name": model_name,
         "status": "complete",
         "outputs": {
@@ -229,6 +337,7 @@ def run_pipeline(
             "metadata": str(output_path / "chunk_metadata.json"),
             "stats": str(output_path / "chunk_stats.json"),
             "embedding_manifest": str(output_path / "embedding_manifest.json"),
+            "embeddings": str(output_path / EMBEDDINGS_FILE),
         },
     }
     save_checkpoint(checkpoint_path, checkpoint)
@@ -241,11 +350,11 @@ def _validate_outputs(output_path: Path, input_file: str) -> None:
     if not chunks_path.exists() or not manifest_path.exists():
         raise FileNotFoundError("Required output files for validation are missing")
 
-    chunks = load_chunks(chunks_path)
+    chunks = ChunksView.from_chunks(load_chunks(chunks_path))
     ChunkValidator.validate_chunks(chunks, min_tokens=120, max_tokens=800)
 
     manifest = load_embedding_manifest(manifest_path)
-    embeddings = manifest.get("chunks", [])
+    embeddings = load_embeddings(manifest_path, manifest)
     ChunkValidator.validate_embeddings(chunks, embeddings)
     ChunkValidator.log_stats(chunks)
     logger.info("Validation-only completed successfully")
@@ -261,6 +370,9 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--force", action="store_true", help="Force recomputation even if outputs are up-to-date")
     parser.add_argument("--verbose", action="store_true", help="Enable debug logging")
     parser.add_argument("--similarity-threshold", type=float, default=0.35, help="Cosine similarity threshold for chunk splitting")
+    parser.add_argument("--precision", choices=["fp32", "fp16", "bf16"], default="fp32", help="Embedding inference precision on CUDA")
+    parser.add_argument("--compile", action="store_true", help="torch.compile the embedding model on CUDA (off by default)")
+    parser.add_argument("--workers", type=int, default=1, help="Parvas to chunk concurrently (threads)")
     return parser.parse_args()
 
 
@@ -275,6 +387,9 @@ def main() -> None:
         verbose=args.verbose,
         force=args.force,
         similarity_threshold=args.similarity_threshold,
+        precision=args.precision,
+        compile_model=args.compile,
+        workers=args.workers,
     )
 
 
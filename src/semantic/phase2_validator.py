@@ -5,6 +5,9 @@ from pathlib import Path
 from typing import Any, Dict, List, Tuple
 from datetime import datetime
 
+import numpy as np
+import orjson
+
 # Support execution as a script (python src/semantic/phase2_validator.py)
 if __package__ is None or __package__ == "":
     src_dir = Path(__file__).resolve().parents[1]
@@ -19,32 +22,32 @@ logger = logging.getLogger(__name__)
 
 def _load_chunks(path: Path) -> List[Dict[str, Any]]:
     chunks: List[Dict[str, Any]] = []
-    with path.open("r", encoding="utf-8") as f:
+    with path.open("rb") as f:
         for line in f:
             if line.strip():
-                chunks.append(json.loads(line))
+                chunks.append(orjson.loads(line))
     return chunks
 
 
 def _chunk_stats(chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
-    token_counts = [int(c.get("token_count", 0)) for c in chunks]
+    tc = np.fromiter((int(c.get("token_count", 0)) for c in chunks), dtype=np.int64, count=len(chunks))
     parva_counts: Dict[str, int] = {}
     for c in chunks:
         name = c.get("parva_name", "Unknown")
         parva_counts[name] = parva_counts.get(name, 0) + 1
 
-    total_tokens = sum(token_counts)
-    below_40 = sum(1 for t in token_counts if t < 40)
-    below_84 = sum(1 for t in token_counts if 40 <= t < 84)
-    below_120 = sum(1 for t in token_counts if 84 <= t < 120)
-    above_800 = sum(1 for t in token_counts if t > 800)
+    total_tokens = int(tc.sum())
+    below_40 = int((tc < 40).sum())
+    below_84 = int(((tc >= 40) & (tc < 84)).sum())
+    below_120 = int(((tc >= 84) & (tc < 120)).sum())
+    above_800 = int((tc > 800).sum())
 
     return {
         "chunk_count": len(chunks),
         "total_tokens": total_tokens,
-        "min_tokens": min(token_counts) if token_counts else 0,
-        "max_tokens": max(token_counts) if token_counts else 0,
-        "avg_tokens": total_tokens / len(token_counts) if token_counts else 0.0,
+        "min_tokens": int(tc.min()) if tc.size else 0,
+        "max_tokens": int(tc.max()) if tc.size else 0,
+        "avg_tokens": total_tokens / tc.size if tc.size else 0.0,
         "per_parva": parva_counts,
         "below_absolute_floor": below_40,
         "below_soft_min": below_84,
@@ -195,43 +198,54 @@ def _validate_embeddings(path: Path, expected_count: int, expected_dim: int) ->
         return report
 
     try:
-        with path.open("r", encoding="utf-8") as f:
-            manifest = json.load(f)
+        # Vectors live in the .npy; the manifest is only header fields + chunk_ids.
+        manifest = orjson.loads(path.read_bytes())
 
         model = manifest.get("model")
         dimension = manifest.get("dimension")
         count = manifest.get("count")
-        chunks = manifest.get("chunks", [])
-
-        # Count fallbacks if needed
-        count_from_list = len(chunks)
-        effective_count = count if count is not None else count_from_list
+        dtype = manifest.get("dtype")
+
+        if "embeddings_file" not in manifest and "chunks" in manifest:
+            raise ValueError("Legacy manifest with inline vectors (no embeddings_file); re-run Phase 2")
+        embeddings_path = path.parent / manifest.get("embeddings_file", "embeddings.npy")
+        if not embeddings_path.exists():
+            raise FileNotFoundError(f"Embedding matrix not found: {embeddings_path}")
+        # mmap only reads the .npy header; shape/dtype checks need no data scan.
+        matrix = np.load(embeddings_path, mmap_mode="r")
+        rows, sample_dim = matrix.shape if matrix.ndim == 2 else (matrix.shape[0], None)
+        effective_count = count if count is not None else rows
+
+        if rows != effective_count:
+            report["errors"].append(f"Embedding matrix rows {rows} differ from manifest count {effective_count}")
+            report["valid"] = False
+        if len(manifest.get("chunk_ids", [])) != rows:
+            report["errors"].append("chunk_ids length does not match embedding matrix rows")
+            report["valid"] = False
+        if dtype and str(matrix.dtype) != dtype:
+            report["warnings"].append(f"Embedding dtype mismatch: declared={dtype}, file={matrix.dtype}")
 
         if expected_count and effective_count != expected_count:
             report["warnings"].append(
                 f"Embedding count mismatch: manifest={effective_count}, chunks={expected_count}"
             )
 
-        # Sample dimension check without scanning all
-        sample_dim = None
-        if chunks:
-            emb = chunks[0].get("embedding", [])
-            sample_dim = len(emb)
-            if dimension and sample_dim != dimension:
-                report["errors"].append(
-                    f"Embedding dimension mismatch: declared={dimension}, sample={sample_dim}"
-                )
-                report["valid"] = False
-            if expected_dim and sample_dim != expected_dim:
-                report["warnings"].append(
-                    f"Embedding dimension differs from expected: sample={sample_dim}, expected={expected_dim}"
-                )
+        if dimension and sample_dim != dimension:
+            report["errors"].append(
+                f"Embedding dimension mismatch: declared={dimension}, sample={sample_dim}"
+            )
+            report["valid"] = False
+        if expected_dim and sample_dim != expected_dim:
+            report["warnings"].append(
+                f"Embedding dimension differs from expected: sample={sample_dim}, expected={expected_dim}"
+            )
 
         report["statistics"] = {
             "model": model,
             "dimension": dimension,
             "count": effective_count,
             "sample_dimension": sample_dim,
+            "dtype": str(matrix.dtype),
         }
 
     except Exception as exc:
@@ -258,7 +272,13 @@ def _validate_checkpoint(path: Path, expected_parvas: int = 18) -> Dict[str, Any
         with path.open("r", encoding="utf-8") as f:
             data = json.load(f)
         processed = data.get("processed_parvas", [])
-        report["statistics"] = {"processed_parvas": processed, "intermediate_chunks": len(data.get("intermediate_chunks", []))}
+        # Committed chunk rows live in the sibling append-only JSONL.
+        chunks_path = path.parent / "parva_chunks.jsonl"
+        intermediate = 0
+        if chunks_path.exists():
+            with chunks_path.open("rb") as f:
+                intermediate = f.read(int(data.get("chunks_bytes", 0))).count(b"\n")
+        report["statistics"] = {"processed_parvas": processed, "intermediate_chunks": intermediate}
         if expected_parvas and len(processed) != expected_parvas:
             report["warnings"].append(
                 f"Checkpoint has {len(processed)} parvas processed, expected {expected_parvas}"
@@ -275,7 +295,7 @@ def run_validation(
     metadata_path: Path = Path("data/semantic_chunks/chunk_metadata.json"),
     stats_path: Path = Path("data/semantic_chunks/chunk_stats.json"),
     embeddings_path: Path = Path("data/semantic_chunks/embedding_manifest.json"),
-    checkpoint_path: Path = Path("data/semantic_chunks/parva_checkpoint.json"),
+    checkpoint_path: Path = Path("data/semantic_chunks/parva_progress.json"),
     report_path: Path = Path("phase2_validation_report.json"),
 ) -> Dict[str, Any]:
     logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -0,0 +1,21 @@
+import os
+import sys
+from typing import Iterable
+
+_TRUTHY = {"1", "true", "yes", "on"}
+
+
+def progress_enabled() -> bool:
+    """Progress bars are off for non-interactive stderr or when MAHABHARAT_QUIET is set (1/true/yes/on)."""
+    if os.getenv("MAHABHARAT_QUIET", "").strip().lower() in _TRUTHY:
+        return False
+    return sys.stderr.isatty()
+
+
+def maybe_tqdm(iterable: Iterable, **kwargs) -> Iterable:
+    """Wrap ``iterable`` in tqdm only when progress bars are enabled."""
+    if not progress_enabled():
+        return iterable
+    from tqdm import tqdm
+
+    return tqdm(iterable, **kwargs)
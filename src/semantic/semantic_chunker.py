@@ -1,8 +1,15 @@
+import copy
 import logging
-from typing import Dict, List, Tuple
+import os
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import numpy as np
-from tqdm import tqdm
+import torch
+import torch.nn.functional as F
 from transformers import AutoTokenizer
 
 from .embedder import Embedder
@@ -10,6 +17,68 @@ from .paragraph_normalizer import ParagraphNormalizer
 
 logger = logging.getLogger(__name__)
 
+# Batched tokenizer calls below rely on the Rust tokenizer's own thread pool.
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+
+# Sentence boundary used when a paragraph exceeds max_tokens.
+_SENT_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+def _chunk_starts(
+    sims: np.ndarray,
+    token_counts: List[int],
+    max_tokens: int,
+    target_tokens: int,
+    min_tokens: int,
+    threshold: float,
+) -> List[int]:
+    """
+    Greedy chunk-boundary decisions for one section.
+
+    sims[i] is the similarity of paragraph i to paragraph i - 1 (1.0 for the
+    first). Returns the start index of every chunk; chunk k spans
+    starts[k]:starts[k + 1]. A chunk closes before a paragraph that would push
+    it past max_tokens, or on a similarity drop once it holds target_tokens
+    (and at least min_tokens).
+
+    Works per chunk rather than per paragraph: with cum the token prefix sum,
+    binary searches find where the chunk would overflow and where it reaches
+    its target, and the split is the first similarity drop in between.
+    """
+    n = len(token_counts)
+    cum = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(token_counts, out=cum[1:])
+    drops = np.flatnonzero(np.asarray(sims) < threshold)
+    need = max(target_tokens, min_tokens)
+
+    starts = [0]
+    start = 0
+    while True:
+        # First paragraph that would overflow the chunk (a lone oversize first paragraph stays).
+        exceed = max(int(np.searchsorted(cum, cum[start] + max_tokens, side="right")) - 1, start + 1)
+        # First paragraph at which the chunk already holds target/min tokens.
+        ready = max(int(np.searchsorted(cum, cum[start] + need, side="left")), start + 1)
+        k = int(np.searchsorted(drops, ready, side="left"))
+        if k < drops.size and drops[k] < min(exceed, n):
+            start = int(drops[k])
+        elif exceed < n:
+            start = exceed
+        else:
+            return starts
+        starts.append(start)
+
+
+def _chunk_id_prefix(parva_number: int, section_index: int) -> str:
+    return f"P{int(parva_number):02d}-S{int(section_index):03d}-C"
+
+
+def _normalize_rows(embs: np.ndarray) -> np.ndarray:
+    # Unit-length rows turn cosine similarity into a plain dot product.
+    # In place: the embedder hands back a fresh float32 matrix, so no second copy is needed.
+    norms = np.linalg.norm(embs, axis=1, keepdims=True)
+    embs /= np.maximum(norms, 1e-12)
+    return embs
+
 
 class SemanticChunker:
     """Deterministic chunker that merges paragraphs with semantic awareness."""
@@ -29,23 +98,78 @@ class SemanticChunker:
         self.min_tokens = min_tokens
         self.max_tokens = max_tokens
         self.similarity_threshold = similarity_threshold
+        # Per-thread so parvas can be chunked concurrently (see iter_chunked_parvas).
+        self._local = threading.local()
+        # Whether joining paragraphs with "\n\n" adds no tokens; checked once on the first
+        # multi-paragraph chunk, after which chunk token counts are summed, not re-tokenized.
+        self._join_is_free: Optional[bool] = None
+
+    @property
+    def _token_cache(self) -> Dict[str, int]:
+        # Token counts primed in batches per section; cleared between sections.
+        cache = getattr(self._local, "token_cache", None)
+        if cache is None:
+            cache = self._local.token_cache = {}
+        return cache
+
+    @property
+    def _tokenizer(self) -> AutoTokenizer:
+        # Worker threads count tokens with their own copy (see _init_worker).
+        return getattr(self._local, "tokenizer", self.tokenizer)
+
+    def _init_worker(self) -> None:
+        # Fast tokenizers keep padding/truncation settings as mutable state, so
+        # sharing one across threads is unsafe.
+        self._local.tokenizer = copy.deepcopy(self.tokenizer)
 
     def _token_count(self, text: str) -> int:
-        return len(self.tokenizer.encode(text, add_special_tokens=False))
-
-    @staticmethod
-    def _cosine(a: np.ndarray, b: np.ndarray) -> float:
-        denom = float(np.linalg.norm(a) * np.linalg.norm(b))
-        if denom == 0.0:
-            return 0.0
-        return float(np.dot(a, b) / denom)
-
-    def chunk_parvas(self, parvas: List[Dict]) -> List[Dict]:
+        cached = self._token_cache.get(text)
+        if cached is not None:
+            return cached
+        return len(self._tokenizer.encode(text, add_special_tokens=False))
+
+    def _prime_token_counts(self, texts: Iterable[str]) -> None:
+        # One batched tokenizer call instead of one encode() per string.
+        missing = [t for t in dict.fromkeys(texts) if t not in self._token_cache]
+        if not missing:
+            return
+        encoded = self._tokenizer(missing, add_special_tokens=False)["input_ids"]
+        self._token_cache.update(zip(missing, map(len, encoded)))
+
+    def chunk_parvas(self, parvas: List[Dict], max_workers: int = 1) -> List[Dict]:
         chunks: List[Dict] = []
-        for parva in parvas:
-            chunks.extend(self._chunk_parva(parva))
+        for _, parva_chunks in self.iter_chunked_parvas(parvas, max_workers=max_workers):
+            chunks.extend(parva_chunks)
         return chunks
 
+    def iter_chunked_parvas(
+        self, parvas: Iterable[Dict], max_workers: int = 1
+    ) -> Iterator[Tuple[Dict, List[Dict]]]:
+        """
+        Yield (parva, chunks) in input order, chunking up to max_workers parvas at once.
+
+        Each worker counts tokens with its own tokenizer copy; embedding calls
+        share one model and are serialized by the Embedder, so threads overlap
+        tokenization with the forward pass without a copy of the model per
+        worker. At most max_workers parvas are in flight, so a streamed input
+        is never fully materialized.
+        """
+        if max_workers <= 1:
+            for parva in parvas:
+                yield parva, self._chunk_parva(parva)
+            return
+
+        with ThreadPoolExecutor(max_workers=max_workers, initializer=self._init_worker) as pool:
+            pending: Deque = deque()
+            for parva in parvas:
+                pending.append((parva, pool.submit(self._chunk_parva, parva)))
+                if len(pending) >= max_workers:
+                    done_parva, future = pending.popleft()
+                    yield done_parva, future.result()
+            while pending:
+                done_parva, future = pending.popleft()
+                yield done_parva, future.result()
+
     def _chunk_parva(self, parva: Dict) -> List[Dict]:
         parva_number = parva.get("parva_number")
         parva_name = parva.get("parva_name")
@@ -78,11 +202,8 @@ class SemanticChunker:
         section_index: int,
         paragraphs: List[str],
     ) -> List[Dict]:
-        chunks: List[Dict] = []
-        current_paras: List[str] = []
-        current_tokens = 0
-        prev_emb: np.ndarray = None
-
+        self._token_cache.clear()
+        self._prime_token_counts(paragraphs)
         expanded_paras: List[str] = []
         for para in paragraphs:
             tokens = self._token_count(para)
@@ -90,106 +211,89 @@ class SemanticChunker:
                 expanded_paras.extend(self._split_long_paragraph(para))
             else:
                 expanded_paras.append(para)
-
-        for para in expanded_paras:
-            para_tokens = self._token_count(para)
-            if para_tokens == 0:
-                continue
-
-            para_emb = self.embedder.embed_text(para)
-            similarity = self._cosine(prev_emb, para_emb) if prev_emb is not None else 1.0
-
-            will_exceed_max = current_tokens + para_tokens > self.max_tokens
-            reached_target = current_tokens >= self.target_tokens
-            sharp_drop = similarity < self.similarity_threshold
-            if will_exceed_max:
-                if current_paras:
-                    chunks.append(
-                        self._finalize_chunk(
-                            current_paras,
-                            parva_number,
-                            parva_name,
-                            section_number,
-                            section_index,
-                            len(chunks) + 1,
-                        )
-                    )
-                current_paras = [para]
-                current_tokens = para_tokens
-                prev_emb = para_emb
-                continue
-
-            should_split = reached_target and sharp_drop
-
-            if should_split and current_tokens >= self.min_tokens:
-                chunks.append(
-                    self._finalize_chunk(
-                        current_paras,
-                        parva_number,
-                        parva_name,
-                        section_number,
-                        section_index,
-                        len(chunks) + 1,
-                    )
-                )
-                current_paras = []
-                current_tokens = 0
-                prev_emb = None
-
-            current_paras.append(para)
-            current_tokens += para_tokens
-            prev_emb = para_emb
-
-        if current_paras:
-            chunks.append(
-                self._finalize_chunk(
-                    current_paras,
-                    parva_number,
-                    parva_name,
-                    section_number,
-                    section_index,
-                    len(chunks) + 1,
-                )
+        self._prime_token_counts(expanded_paras)
+        expanded_paras = [para for para in expanded_paras if self._token_count(para) > 0]
+        if not expanded_paras:
+            return []
+
+        token_counts = [self._token_count(para) for para in expanded_paras]
+        sims = self._adjacent_similarities(expanded_paras)
+
+        starts = _chunk_starts(
+            sims, token_counts, self.max_tokens, self.target_tokens, self.min_tokens, self.similarity_threshold
+        )
+        chunks = [
+            self._finalize_chunk(
+                expanded_paras[start:end],
+                token_counts[start:end],
+                parva_number,
+                parva_name,
+                section_number,
+                section_index,
+                chunk_index,
             )
+            for chunk_index, (start, end) in enumerate(zip(starts, starts[1:] + [len(expanded_paras)]), start=1)
+        ]
 
         chunks = self._merge_small_chunks(chunks)
         return chunks
 
+    def _adjacent_similarities(self, paragraphs: List[str]) -> np.ndarray:
+        """
+        Cosine similarity of each paragraph to the one before it (1.0 for the first).
+
+        One batched forward pass for the whole section. On CUDA the embeddings
+        stay on the device and only the N similarities are copied back.
+        """
+        sims = np.ones(len(paragraphs), dtype=np.float32)
+        if str(getattr(self.embedder, "device", "cpu")).startswith("cuda"):
+            embs = self.embedder.embed_texts(paragraphs, show_progress_bar=False, as_tensor=True)
+            with torch.inference_mode():
+                sims[1:] = F.cosine_similarity(embs[:-1], embs[1:], dim=1, eps=1e-12).cpu().numpy()
+            return sims
+
+        embs = _normalize_rows(self.embedder.embed_texts(paragraphs, show_progress_bar=False))
+        sims[1:] = np.einsum("ij,ij->i", embs[:-1], embs[1:])
+        return sims
+
     def _merge_small_chunks(self, chunks: List[Dict]) -> List[Dict]:
         if not chunks:
             return chunks
 
+        # Chunks come fresh from _finalize_chunk, so merges mutate them in place.
+        # Texts are collected per merged chunk and joined once at the end, so
+        # chains of small chunks don't re-copy the growing text on every merge.
         merged: List[Dict] = []
-        i = 0
-        while i < len(chunks):
+        text_parts: List[List[str]] = []
+        i, n = 0, len(chunks)
+        while i < n:
             chunk = chunks[i]
-            if chunk["token_count"] < self.min_tokens:
+            i += 1
+            tokens = chunk["token_count"]
+            if tokens < self.min_tokens:
                 # Try merge with previous if possible
-                if merged:
-                    prev = merged[-1]
-                    combined_tokens = prev["token_count"] + chunk["token_count"]
-                    if combined_tokens <= self.max_tokens:
-                        prev["text"] = prev["text"] + "\n\n" + chunk["text"]
-                        prev["token_count"] = combined_tokens
-                        i += 1
-                        continue
-                # Else try merge forward
-                if i + 1 < len(chunks):
-                    nxt = chunks[i + 1]
-                    combined_tokens = chunk["token_count"] + nxt["token_count"]
-                    if combined_tokens <= self.max_tokens:
-                        merged_chunk = chunk.copy()
-                        merged_chunk["text"] = chunk["text"] + "\n\n" + nxt["text"]
-                        merged_chunk["token_count"] = combined_tokens
-                        merged.append(merged_chunk)
-                        i += 2
-                        continue
+                if merged and merged[-1]["token_count"] + tokens <= self.max_tokens:
+                    merged[-1]["token_count"] += tokens
+                    text_parts[-1].append(chunk["text"])
+                    continue
+                # Else try merge forward, consuming the next chunk
+                if i < n and tokens + chunks[i]["token_count"] <= self.max_tokens:
+                    nxt = chunks[i]
+                    chunk["token_count"] = tokens + nxt["token_count"]
+                    merged.append(chunk)
+                    text_parts.append([chunk["text"], nxt["text"]])
+                    i += 1
+                    continue
             merged.append(chunk)
-            i += 1
+            text_parts.append([chunk["text"]])
 
-        # Soft minimum enforcement - only fail on extremely small chunks
+        # Soft minimum enforcement (only fail on extremely small chunks), then
+        # renumber chunk indices and ids deterministically, in one pass.
         absolute_floor = 40
-        for chunk in merged:
+        group, prefix = None, ""
+        for idx, (chunk, parts) in enumerate(zip(merged, text_parts), start=1):
+            if len(parts) > 1:
+                chunk["text"] = "\n\n".join(parts)
             if chunk["token_count"] < absolute_floor:
                 raise ValueError(
                     f"Chunk {chunk.get('chunk_id', 'unknown')} has {chunk['token_count']} tokens, "
@@ -200,17 +304,19 @@ class SemanticChunker:
                     f"Chunk {chunk.get('chunk_id', 'unknown')} has {chunk['token_count']} tokens, "
                     f"below preferred minimum {self.min_tokens} (accepted as unmergeable)"
                 )
-
-        # Renumber chunk indices and ids deterministically after merges
-        for idx, chunk in enumerate(merged, start=1):
+            # Chunks of one (parva, section) are consecutive; format their id prefix once.
+            if (chunk["parva_number"], chunk["section_index"]) != group:
+                group = (chunk["parva_number"], chunk["section_index"])
+                prefix = _chunk_id_prefix(*group)
             chunk["chunk_index"] = idx
-            chunk["chunk_id"] = f"P{int(chunk['parva_number']):02d}-S{int(chunk['section_index']):03d}-C{idx:03d}"
+            chunk["chunk_id"] = f"{prefix}{idx:03d}"
 
         return merged
 
     def _finalize_chunk(
         self,
         paragraphs: List[str],
+        paragraph_token_counts: List[int],
         parva_number: int,
         parva_name: str,
         section_number: str,
@@ -218,8 +324,15 @@ class SemanticChunker:
         chunk_index: int,
     ) -> Dict:
         text = "\n\n".join(paragraphs).strip()
-        token_count = self._token_count(text)
-        chunk_id = f"P{int(parva_number):02d}-S{int(section_index):03d}-C{int(chunk_index):03d}"
+        token_count = sum(paragraph_token_counts)
+        if len(paragraphs) > 1 and not self._join_is_free:
+            exact = self._token_count(text)
+            if self._join_is_free is None:
+                self._join_is_free = exact == token_count
+                if not self._join_is_free:
+                    logger.warning("Tokenizer counts tokens across paragraph joins; re-tokenizing every chunk")
+            token_count = exact
+        chunk_id = f"{_chunk_id_prefix(parva_number, section_index)}{int(chunk_index):03d}"
         return {
             "chunk_id": chunk_id,
             "parva_number": parva_number,
@@ -235,9 +348,8 @@ class SemanticChunker:
 
     def _split_long_paragraph(self, paragraph: str) -> List[str]:
         # Split by sentence boundaries to keep pieces under the hard max token limit.
-        import re
-
-        sentences = re.split(r"(?<=[.!?])\s+", paragraph)
+        sentences = _SENT_SPLIT.split(paragraph)
+        self._prime_token_counts(s for s in map(str.strip, sentences) if s)
         splits: List[str] = []
         buffer: List[str] = []
         buffer_tokens = 0
@@ -249,10 +361,10 @@ class SemanticChunker:
             if sent_tokens > self.max_tokens:
                 # As a last resort, hard cut the sentence to respect the ceiling.
                 words = sent.split()
+                word_ids = self._tokenizer(words, add_special_tokens=False)["input_ids"]
                 current: List[str] = []
                 current_tokens = 0
-                for word in words:
-                    word_tokens = self._token_count(word)
+                for word, word_tokens in zip(words, map(len, word_ids)):
                     if current_tokens + word_tokens > self.max_tokens:
                         if current:
                             splits.append(" ".join(current))
@@ -1,9 +1,63 @@
 import logging
-from typing import Dict, List
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class ChunksView:
+    """Columnar view of a chunk list: one array per field the validators need."""
+
+    chunk_ids: np.ndarray  # object
+    parva_names: np.ndarray  # object
+    token_counts: np.ndarray  # int64
+    has_text: np.ndarray  # bool
+    missing_fields: np.ndarray  # bool, True where a required field is absent
+    chunks: List[Dict]
+
+    @classmethod
+    def from_chunks(cls, chunks: List[Dict]) -> "ChunksView":
+        n = len(chunks)
+        required = ChunkValidator.REQUIRED_FIELDS
+        ids = np.empty(n, dtype=object)
+        names = np.empty(n, dtype=object)
+        ids[:] = [c.get("chunk_id") for c in chunks]
+        names[:] = [c.get("parva_name", "Unknown") for c in chunks]
+        return cls(
+            chunk_ids=ids,
+            parva_names=names,
+            token_counts=np.fromiter((int(c.get("token_count", 0)) for c in chunks), dtype=np.int64, count=n),
+            has_text=np.fromiter((bool(c.get("text", "").strip()) for c in chunks), dtype=bool, count=n),
+            # dict_keys >= set tests membership without building a set per chunk.
+            missing_fields=np.fromiter((not c.keys() >= required for c in chunks), dtype=bool, count=n),
+            chunks=chunks,
+        )
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+
+ChunksLike = Union[List[Dict], ChunksView]
+
+
+def _as_view(chunks: ChunksLike) -> ChunksView:
+    return chunks if isinstance(chunks, ChunksView) else ChunksView.from_chunks(chunks)
+
+
+def _duplicate_mask(ids: np.ndarray) -> np.ndarray:
+    # True for every repeat of an id after its first occurrence.
+    first_seen: Dict = {}
+    setdefault = first_seen.setdefault
+    dup = np.zeros(ids.size, dtype=bool)
+    for i, cid in enumerate(ids.tolist()):
+        if setdefault(cid, i) != i:
+            dup[i] = True
+    return dup
+
+
 class ChunkValidator:
     REQUIRED_FIELDS = {
         "chunk_id",
@@ -20,47 +74,49 @@ class ChunkValidator:
 
     @staticmethod
     def validate_chunks(
-        chunks: List[Dict],
+        chunks: ChunksLike,
         min_tokens: int,
         max_tokens: int,
     ) -> None:
-        seen_ids = set()
+        view = _as_view(chunks)
         soft_min = int(0.7 * min_tokens)
         absolute_floor = 40
-        soft_min_count = 0
-        
-        for chunk in chunks:
-            missing = ChunkValidator.REQUIRED_FIELDS - set(chunk.keys())
-            if missing:
-                raise ValueError(f"Chunk {chunk.get('chunk_id')} missing fields: {missing}")
-
-            cid = chunk.get("chunk_id")
-            if cid in seen_ids:
-                raise ValueError(f"Duplicate chunk_id detected: {cid}")
-            seen_ids.add(cid)
-
-            tokens = int(chunk.get("token_count", 0))
-            
-            # Soft minimum logic matching chunker
-            if tokens < absolute_floor:
-                raise ValueError(f"Chunk {cid} below absolute floor: {tokens} < {absolute_floor}")
-            elif tokens < soft_min:
-                logger.warning(f"Chunk {cid} below soft minimum: {tokens} < {soft_min}")
-                soft_min_count += 1
-            elif tokens < min_tokens:
-                soft_min_count += 1
-            
-            if tokens > max_tokens:
-                raise ValueError(f"Chunk {cid} exceeds maximum tokens: {tokens} > {max_tokens}")
-
-            text = chunk.get("text", "").strip()
-            if not text:
-                raise ValueError(f"Chunk {cid} has empty text")
+        tokens = view.token_counts
+
+        # Checks in per-chunk order; the first chunk failing any of them is reported.
+        duplicate = _duplicate_mask(view.chunk_ids)
+        below_floor = tokens < absolute_floor
+        above_max = tokens > max_tokens
+        bad = view.missing_fields | duplicate | below_floor | above_max | ~view.has_text
+        first_bad = int(np.argmax(bad)) if bad.any() else len(view)
+
+        # Soft minimum logic matching chunker; a chunk that fails later checks still warns first.
+        warn_end = first_bad
+        if first_bad < len(view) and not (view.missing_fields[first_bad] or duplicate[first_bad]):
+            warn_end += 1
+        soft = (tokens[:warn_end] >= absolute_floor) & (tokens[:warn_end] < soft_min)
+        for i in np.flatnonzero(soft):
+            logger.warning(f"Chunk {view.chunk_ids[i]} below soft minimum: {tokens[i]} < {soft_min}")
+
+        if first_bad == len(view):
+            return
+        i = first_bad
+        cid = view.chunk_ids[i]
+        if view.missing_fields[i]:
+            missing = ChunkValidator.REQUIRED_FIELDS - set(view.chunks[i].keys())
+            raise ValueError(f"Chunk {cid} missing fields: {missing}")
+        if duplicate[i]:
+            raise ValueError(f"Duplicate chunk_id detected: {cid}")
+        if below_floor[i]:
+            raise ValueError(f"Chunk {cid} below absolute floor: {tokens[i]} < {absolute_floor}")
+        if above_max[i]:
+            raise ValueError(f"Chunk {cid} exceeds maximum tokens: {tokens[i]} > {max_tokens}")
+        raise ValueError(f"Chunk {cid} has empty text")
 
     @staticmethod
     def validate_embeddings(
-        chunks: List[Dict],
-        embeddings: List,
+        chunks: ChunksLike,
+        embeddings: Union[np.ndarray, Sequence],
     ) -> None:
         if len(chunks) != len(embeddings):
             raise ValueError(
@@ -68,14 +124,18 @@ class ChunkValidator:
             )
 
     @staticmethod
-    def log_stats(chunks: List[Dict]) -> None:
-        if not chunks:
+    def log_stats(chunks: ChunksLike) -> None:
+        if not len(chunks):
             return
-        token_counts = [c.get("token_count", 0) for c in chunks]
+        view = _as_view(chunks)
+        token_counts = view.token_counts
         logger.warning(
             "Chunk stats: count=%s, min=%s, max=%s, avg=%.1f",
-            len(chunks),
-            min(token_counts),
-            max(token_counts),
-            sum(token_counts) / len(token_counts),
+            len(view),
+            token_counts.min(),
+            token_counts.max(),
+            token_counts.mean(),
         )
+        if logger.isEnabledFor(logging.DEBUG):
+            names, counts = np.unique(view.parva_names.astype(str), return_counts=True)
+            logger.debug("Chunks per parva: %s", dict(zip(names.tolist(), counts.tolist())))
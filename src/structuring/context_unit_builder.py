@@ -10,9 +10,21 @@ import logging
 import json
 from pathlib import Path
 
+try:
+    import orjson
+    _has_orjson = True
+except ImportError:
+    _has_orjson = False
+
 logger = logging.getLogger(__name__)
 
 
+def _dumps_line(unit: Dict[str, any]) -> bytes:
+    if _has_orjson:
+        return orjson.dumps(unit)
+    return json.dumps(unit).encode('utf-8')
+
+
 class ContextUnitBuilder:
     """Build Context Units from paragraphs and semantic boundaries."""
 
@@ -26,6 +38,7 @@ class ContextUnitBuilder:
         """
         self.min_paragraphs = min_paragraphs
         self.max_paragraphs = max_paragraphs
+        self._prepared_dirs = set()
 
     def build_context_units(
         self,
@@ -47,25 +60,25 @@ class ContextUnitBuilder:
             List of Context Unit dictionaries
         """
         context_units = []
-        unit_id = 0
+        id_prefix = f"{parva}_{section}_CU"
         
-        for i in range(0, len(paragraphs), self.max_paragraphs):
+        for unit_id, i in enumerate(range(0, len(paragraphs), self.max_paragraphs)):
             unit_paragraphs = paragraphs[i:i + self.max_paragraphs]
+            texts = [p['text'] for p in unit_paragraphs]
             
             unit = {
-                'unit_id': f"{parva}_{section}_CU{unit_id}",
+                'unit_id': f"{id_prefix}{unit_id}",
                 'parva': parva,
                 'section': section,
                 'story_phase': story_phase,
-                'paragraphs': [p['text'] for p in unit_paragraphs],
-                'text': ' '.join([p['text'] for p in unit_paragraphs]),
+                'paragraphs': texts,
+                'text': ' '.join(texts),
                 'paragraph_indices': [p['index'] for p in unit_paragraphs],
                 'entities': [],  # To be filled by NER
                 'embedding': None  # To be filled by embedding service
             }
             
             context_units.append(unit)
-            unit_id += 1
         
         logger.info(f"Built {len(context_units)} Context Units for {parva} {section}")
         return context_units
@@ -83,11 +96,14 @@ class ContextUnitBuilder:
             output_path: Output JSONL file path
         """
         output_file = Path(output_path)
-        output_file.parent.mkdir(parents=True, exist_ok=True)
+        if output_file.parent not in self._prepared_dirs:
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            self._prepared_dirs.add(output_file.parent)
         
-        with open(output_file, 'a') as f:
-            for unit in context_units:
-                f.write(json.dumps(unit) + '\n')
+        # Serialize everything first, then append with a single write
+        payload = b''.join(_dumps_line(unit) + b'\n' for unit in context_units)
+        with open(output_file, 'ab') as f:
+            f.write(payload)
         
         logger.info(f"Saved {len(context_units)} Context Units to {output_path}")
 
@@ -15,10 +15,11 @@ logger = logging.getLogger(__name__)
 class ParagraphSplitter:
     """Split parsed text into structured paragraphs."""
 
+    # Empty line indicates paragraph boundary (shared by all instances)
+    paragraph_boundary = re.compile(r'\n\s*\n+')
+
     def __init__(self):
         """Initialize paragraph splitter with heuristics."""
-        # Empty line indicates paragraph boundary
-        self.paragraph_boundary = re.compile(r'\n\s*\n+')
 
     def split_into_paragraphs(self, text: str) -> List[str]:
         """
@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Make "import semantic" / "import retrieval" work the same way the pipelines do.
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+WORDS = "karna arjuna bhishma drona slain war days bed arrows the was by of and".split()
+
+
+@pytest.fixture(scope="session")
+def tiny_model_dir(tmp_path_factory) -> Path:
+    """A randomly initialised BERT SentenceTransformer saved locally (no downloads)."""
+    torch = pytest.importorskip("torch")
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    root = tmp_path_factory.mktemp("tiny_model")
+    bert_dir = root / "bert"
+    bert_dir.mkdir()
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", ".", "!", "?", ","] + WORDS
+    (root / "vocab.txt").write_text("\n".join(vocab) + "\n", encoding="utf-8")
+    BertTokenizerFast(vocab_file=str(root / "vocab.txt")).save_pretrained(str(bert_dir))
+
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        max_position_embeddings=512,
+    )
+    BertModel(config).save_pretrained(str(bert_dir))
+
+    transformer = models.Transformer(str(bert_dir), max_seq_length=512)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension())
+    st_dir = root / "st"
+    SentenceTransformer(modules=[transformer, pooling], device="cpu").save(str(st_dir))
+    return st_dir
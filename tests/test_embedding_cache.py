@@ -0,0 +1,21 @@
+import numpy as np
+
+from semantic.embedder import Embedder
+from semantic.embedding_cache import CachedEmbedder
+
+
+def test_cached_embeddings_match_uncached(tiny_model_dir, tmp_path):
+    embedder = Embedder(model_name=str(tiny_model_dir), device="cpu")
+    texts = [f"karna slain by arjuna {'war ' * i}" for i in range(40)] + ["the bed of arrows"] * 3
+    expected = embedder.embed_texts(texts, show_progress_bar=False)
+
+    cached = CachedEmbedder(embedder, tmp_path / "cache.sqlite3")
+    misses = cached.embed_texts(texts, show_progress_bar=False)
+    hits = cached.embed_texts(texts, show_progress_bar=False)
+    cached.close()
+
+    assert misses.dtype == hits.dtype == np.float32
+    np.testing.assert_array_equal(misses, expected)
+    np.testing.assert_array_equal(hits, expected)
+    assert cached.misses == len(texts)
+    assert cached.hits == len(texts)
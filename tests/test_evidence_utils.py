@@ -0,0 +1,15 @@
+from retrieval.utils.evidence_utils import aggregate_death_evidence
+
+
+def test_aggregate_death_evidence_prefers_cooccurrence():
+    chunks = [
+        {"chunk_id": "A", "text": "Arjuna rode out. Karna was slain by him that day."},
+        {"chunk_id": "B", "text": "Karna fell on the field."},
+        {"chunk_id": "C", "text": "Partha stood by the chariot."},
+        {"chunk_id": "D", "text": "The assembly rose."},
+    ]
+    result = aggregate_death_evidence(chunks, "Karna", ["arjuna", "partha"])
+    assert result["supported"]
+    assert [c["chunk_id"] for c in result["cooccur_chunks"]] == ["A"]
+    assert [c["chunk_id"] for c in result["death_chunks"]] == ["A", "B"]
+    assert result["citations"] == ["A", "B", "C"]
@@ -0,0 +1,71 @@
+import json
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from retrieval.faiss_index import DEFAULT_INDEX_SPEC, MIN_POINTS_PER_LIST, FaissIndex
+
+
+def _write_manifest(tmp_path, count: int, dim: int):
+    rng = np.random.default_rng(0)
+    np.save(tmp_path / "embeddings.npy", rng.standard_normal((count, dim)).astype(np.float16))
+    manifest = {
+        "model": "test",
+        "dimension": dim,
+        "dtype": "float16",
+        "count": count,
+        "embeddings_file": "embeddings.npy",
+        "chunk_ids": [f"C{i:05d}" for i in range(count)],
+    }
+    path = tmp_path / "embedding_manifest.json"
+    path.write_text(json.dumps(manifest), encoding="utf-8")
+    return path
+
+
+def _indexer(tmp_path, manifest_path, **kwargs) -> FaissIndex:
+    return FaissIndex(
+        manifest_path=manifest_path,
+        index_path=tmp_path / "faiss.index",
+        id_map_path=tmp_path / "id_mapping.json",
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize("count,dim", [(50, 100), (9000, 100), (50, 768)])
+def test_untrainable_spec_falls_back_to_flat(tmp_path, count, dim):
+    index, ids = _indexer(tmp_path, _write_manifest(tmp_path, count, dim)).build()
+    assert isinstance(index, faiss.IndexFlatIP)
+    assert index.ntotal == len(ids) == count
+
+
+def test_default_spec_trains_on_corpus_size():
+    # The Phase 2 corpus holds ~8.6k chunks; the default IVF must not fall back to Flat for it.
+    nlist = faiss.extract_index_ivf(faiss.index_factory(768, DEFAULT_INDEX_SPEC)).nlist
+    assert MIN_POINTS_PER_LIST * nlist <= 8000
+
+
+def test_ivf_spec_trains_and_applies_nprobe(tmp_path):
+    manifest_path = _write_manifest(tmp_path, 1000, 64)
+    index, ids = _indexer(tmp_path, manifest_path, index_spec="IVF16,PQ8", nprobe=4).build()
+    assert faiss.extract_index_ivf(index).nprobe == 4
+    assert index.ntotal == len(ids) == 1000
+
+
+def test_legacy_inline_manifest_builds(tmp_path):
+    manifest = {"model": "test", "dimension": 4, "count": 3, "chunks": [
+        {"chunk_id": f"C{i}", "embedding": [float(i == j) for j in range(4)]} for i in range(3)
+    ]}
+    path = tmp_path / "embedding_manifest.json"
+    path.write_text(json.dumps(manifest), encoding="utf-8")
+    index, ids = _indexer(tmp_path, path).build()
+    assert ids == ["C0", "C1", "C2"]
+    assert index.ntotal == 3
+
+
+def test_manifest_without_vectors_asks_for_phase2_rerun(tmp_path):
+    path = tmp_path / "embedding_manifest.json"
+    path.write_text(json.dumps({"model": "test", "dimension": 4}), encoding="utf-8")
+    with pytest.raises(ValueError, match="re-run Phase 2"):
+        _indexer(tmp_path, path).build()
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from semantic.phase2_pipeline import EMBEDDINGS_FILE, build_embedding_manifest, load_embeddings
+
+
+def test_load_embeddings_reads_matrix(tmp_path):
+    matrix = np.arange(6, dtype=np.float16).reshape(3, 2)
+    np.save(tmp_path / EMBEDDINGS_FILE, matrix)
+    manifest = build_embedding_manifest("test", 2, ["a", "b", "c"])
+    np.testing.assert_array_equal(load_embeddings(tmp_path / "embedding_manifest.json", manifest), matrix)
+
+
+def test_load_embeddings_reads_legacy_inline_vectors(tmp_path):
+    manifest = {"model": "test", "dimension": 2, "count": 2, "chunks": [
+        {"chunk_id": "a", "embedding": [0.0, 1.0]},
+        {"chunk_id": "b", "embedding": [1.0, 0.0]},
+    ]}
+    embeddings = load_embeddings(tmp_path / "embedding_manifest.json", manifest)
+    assert embeddings.shape == (2, 2)
+
+
+def test_load_embeddings_rejects_manifest_without_vectors(tmp_path):
+    with pytest.raises(ValueError, match="re-run Phase 2"):
+        load_embeddings(tmp_path / "embedding_manifest.json", {"model": "test", "dimension": 2})
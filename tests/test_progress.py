@@ -0,0 +1,10 @@
+import pytest
+
+from semantic.progress import progress_enabled
+
+
+@pytest.mark.parametrize("value", ["1", "true", "YES", " on ", "0", "false", "", "nonsense"])
+def test_quiet_env_never_raises(monkeypatch, value):
+    monkeypatch.setenv("MAHABHARAT_QUIET", value)
+    monkeypatch.setattr("sys.stderr.isatty", lambda: True)
+    assert progress_enabled() == (value.strip().lower() not in {"1", "true", "yes", "on"})
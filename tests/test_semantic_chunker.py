@@ -0,0 +1,46 @@
+import random
+
+from transformers import AutoTokenizer
+
+from conftest import WORDS
+from semantic.embedder import Embedder
+from semantic.semantic_chunker import SemanticChunker
+
+
+def _paragraph(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) + rng.choice(["", "", "", ".", "!", ","]) for _ in range(rng.choice([50, 80, 120]))]
+    return " ".join(words)
+
+
+def _parvas(seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        {
+            "parva_number": p,
+            "parva_name": f"Parva {p}",
+            "sections": [
+                {"section_number": str(s), "paragraphs": [_paragraph(rng) for _ in range(rng.randint(2, 6))]}
+                for s in range(1, rng.randint(3, 8))
+            ],
+        }
+        for p in range(1, 25)
+    ]
+
+
+def test_chunk_parvas_threads_match_serial(tiny_model_dir):
+    tokenizer = AutoTokenizer.from_pretrained(str(tiny_model_dir))
+    embedder = Embedder(model_name=str(tiny_model_dir), device="cpu")
+    chunker = SemanticChunker(
+        tokenizer=tokenizer,
+        embedder=embedder,
+        target_tokens=120,
+        min_tokens=45,
+        max_tokens=200,
+        similarity_threshold=0.35,
+    )
+    parvas = _parvas()
+
+    serial = chunker.chunk_parvas(parvas)
+    assert serial
+    for _ in range(3):
+        assert chunker.chunk_parvas(parvas, max_workers=4) == serial